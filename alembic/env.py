@@ -37,14 +37,21 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def do_run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True
+    )
+
+    # Alembic has to own the transaction, so migrations can step out of it with autocommit_block().
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 async def run_migrations_online() -> None:
-    async with connectable.begin() as connection:
-        await connection.run_sync(lambda conn: context.configure(
-            connection=conn,
-            target_metadata=target_metadata,
-            compare_type=True
-        ))
-        await connection.run_sync(lambda conn: context.run_migrations())
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
 
 
 if context.is_offline_mode():
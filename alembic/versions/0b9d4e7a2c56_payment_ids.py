@@ -0,0 +1,96 @@
+"""payment ids
+
+Revision ID: 0b9d4e7a2c56
+Revises: e5b18f3c7d42
+Create Date: 2026-10-18 14:12:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b9d4e7a2c56'
+down_revision: Union[str, None] = 'e5b18f3c7d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Once partitioned, payments.id is unique only together with payment_date. payment_ids holds
+    # every id once, kept in step with payments the same way credit_ids is with credits.
+    op.create_table('payment_ids',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute("""
+        DO $$
+        DECLARE
+            archived record;
+        BEGIN
+            INSERT INTO payment_ids (id) SELECT id FROM payments;
+            FOR archived IN
+                SELECT namespace.nspname, class.relname
+                  FROM pg_class class
+                  JOIN pg_namespace namespace ON namespace.oid = class.relnamespace
+                 WHERE class.relkind = 'r' AND NOT class.relispartition
+                   AND class.relname ~ '^payments_y[0-9]{4}m[0-9]{2}$'
+            LOOP
+                EXECUTE format('INSERT INTO payment_ids (id) SELECT id FROM %I.%I', archived.nspname, archived.relname);
+            END LOOP;
+        END
+        $$
+    """)
+
+    # An id that is already taken by a payment with another payment_date fails on payment_ids_pkey.
+    # Moving a payment to another date with UPDATE keeps its id, and fires neither statement trigger.
+    op.execute("""
+        CREATE FUNCTION payment_ids_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO payment_ids (id) SELECT id FROM inserted;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER payment_ids_insert AFTER INSERT ON payments
+        REFERENCING NEW TABLE AS inserted FOR EACH STATEMENT EXECUTE FUNCTION payment_ids_insert()
+    """)
+    op.execute("""
+        CREATE FUNCTION payment_ids_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM payment_ids USING deleted WHERE payment_ids.id = deleted.id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER payment_ids_delete AFTER DELETE ON payments
+        REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION payment_ids_delete()
+    """)
+    op.execute("""
+        CREATE FUNCTION payment_ids_reject_update() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            RAISE EXCEPTION 'payments.id cannot be changed (payment %)', OLD.id;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER payment_ids_reject_update BEFORE UPDATE OF id ON payments
+        FOR EACH ROW WHEN (NEW.id <> OLD.id) EXECUTE FUNCTION payment_ids_reject_update()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER payment_ids_reject_update ON payments")
+    op.execute("DROP TRIGGER payment_ids_delete ON payments")
+    op.execute("DROP TRIGGER payment_ids_insert ON payments")
+    op.execute("DROP FUNCTION payment_ids_reject_update()")
+    op.execute("DROP FUNCTION payment_ids_delete()")
+    op.execute("DROP FUNCTION payment_ids_insert()")
+    op.drop_table('payment_ids')
@@ -0,0 +1,50 @@
+"""overdue bucket indexes
+
+Revision ID: 5e0b7c9a3d41
+Revises: 1c2464d50bf1
+Create Date: 2026-10-18 15:42:10.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7c9a3d41'
+down_revision: Union[str, None] = '1c2464d50bf1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_payments_type_id_payment_date', 'payments', ['type_id', 'payment_date'],
+            postgresql_include=['credit_id', 'sum'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Supersedes ix_credits_issuance_date; built before the old one is dropped so reads keep an index.
+        op.create_index(
+            'ix_credits_issuance_date_cover', 'credits', ['issuance_date'],
+            postgresql_include=['body', 'return_date', 'actual_return_date'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index('ix_credits_issuance_date', table_name='credits', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_credits_issuance_date', 'credits', ['issuance_date'],
+            postgresql_include=['body'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index('ix_credits_issuance_date_cover', table_name='credits', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_payments_type_id_payment_date', table_name='payments', postgresql_concurrently=True, if_exists=True)
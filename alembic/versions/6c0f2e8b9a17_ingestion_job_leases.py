@@ -0,0 +1,30 @@
+"""ingestion job leases
+
+Revision ID: 6c0f2e8b9a17
+Revises: d7a2c5e81f34
+Create Date: 2026-10-18 23:12:40.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6c0f2e8b9a17'
+down_revision: Union[str, None] = 'd7a2c5e81f34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingestion_jobs', sa.Column('owner', sa.String(length=100), nullable=True))
+    op.add_column('ingestion_jobs', sa.Column('lease_expires_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingestion_jobs', 'lease_expires_at')
+    op.drop_column('ingestion_jobs', 'owner')
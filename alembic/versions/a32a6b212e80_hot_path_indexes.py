@@ -0,0 +1,46 @@
+"""hot path indexes
+
+Revision ID: a32a6b212e80
+Revises: a7e93df471fd
+Create Date: 2026-10-18 12:20:54.871302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a32a6b212e80'
+down_revision: Union[str, None] = 'a7e93df471fd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_credits_user_id', 'credits', ['user_id'], []),
+    ('ix_credits_issuance_date', 'credits', ['issuance_date'], ['body']),
+    ('ix_payments_credit_id', 'payments', ['credit_id'], ['type_id', 'sum']),
+    ('ix_payments_payment_date', 'payments', ['payment_date'], ['sum']),
+    ('ix_dictionary_name', 'dictionary', ['name'], []),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_include=include,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,50 @@
+"""performance rollup
+
+Revision ID: a7e93df471fd
+Revises: dbadc92f45b8
+Create Date: 2026-10-18 11:03:27.540118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e93df471fd'
+down_revision: Union[str, None] = 'dbadc92f45b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('performance_rollup',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('issued_count', sa.Integer(), nullable=False),
+    sa.Column('issued_body', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('collected_count', sa.Integer(), nullable=False),
+    sa.Column('collected_sum', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['dictionary.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('day', 'category_id')
+    )
+    op.execute("""
+        INSERT INTO performance_rollup
+            (day, category_id, issued_count, issued_body, collected_count, collected_sum)
+        SELECT c.issuance_date, d.id, COUNT(*), SUM(c.body), 0, 0
+        FROM credits c
+        JOIN dictionary d ON d.name = 'видача'
+        GROUP BY c.issuance_date, d.id
+        UNION ALL
+        SELECT p.payment_date, d.id, 0, 0, COUNT(*), SUM(p.sum)
+        FROM payments p
+        JOIN dictionary d ON d.name = 'збір'
+        GROUP BY p.payment_date, d.id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('performance_rollup')
@@ -0,0 +1,41 @@
+"""ingestion checkpoints
+
+Revision ID: b41c7e9d2f60
+Revises: 8f3d2a61c7b9
+Create Date: 2026-10-18 19:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41c7e9d2f60'
+down_revision: Union[str, None] = '8f3d2a61c7b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ingestion_checkpoints',
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('rows_total', sa.Integer(), nullable=False),
+    sa.Column('rows_committed', sa.Integer(), nullable=False),
+    sa.Column('chunks_committed', sa.Integer(), nullable=False),
+    sa.Column('state', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('file_hash', 'table_name')
+    )
+    op.add_column('ingestion_jobs', sa.Column('options', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingestion_jobs', 'options')
+    op.drop_table('ingestion_checkpoints')
@@ -0,0 +1,49 @@
+"""credit balances
+
+Revision ID: d7a2c5e81f34
+Revises: b41c7e9d2f60
+Create Date: 2026-10-18 20:03:51.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7a2c5e81f34'
+down_revision: Union[str, None] = 'b41c7e9d2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('credit_balances',
+    sa.Column('credit_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('body_paid', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('percent_paid', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('total_paid', sa.Numeric(precision=16, scale=2), nullable=False),
+    sa.Column('last_payment_date', sa.Date(), nullable=True),
+    sa.Column('payment_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('credit_id')
+    )
+
+    # Filled from the payments already loaded, with the type ids the dictionary has now.
+    op.execute("""
+        INSERT INTO credit_balances (credit_id, body_paid, percent_paid, total_paid, last_payment_date, payment_count)
+        SELECT payments.credit_id,
+               COALESCE(SUM(payments.sum) FILTER (WHERE dictionary.name = 'тіло'), 0),
+               COALESCE(SUM(payments.sum) FILTER (WHERE dictionary.name = 'відсотки'), 0),
+               SUM(payments.sum),
+               MAX(payments.payment_date),
+               COUNT(*)
+        FROM payments JOIN dictionary ON dictionary.id = payments.type_id
+        GROUP BY payments.credit_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('credit_balances')
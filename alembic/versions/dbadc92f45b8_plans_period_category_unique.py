@@ -0,0 +1,31 @@
+"""plans period category unique
+
+Revision ID: dbadc92f45b8
+Revises: 575111aefdee
+Create Date: 2026-10-18 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dbadc92f45b8'
+down_revision: Union[str, None] = '575111aefdee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_unique_constraint('uq_plans_period_category', 'plans', ['period', 'category_id'])
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('plans', 'id'), COALESCE((SELECT MAX(id) FROM plans), 1))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_plans_period_category', 'plans', type_='unique')
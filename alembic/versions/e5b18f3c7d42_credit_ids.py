@@ -0,0 +1,109 @@
+"""credit ids
+
+Revision ID: e5b18f3c7d42
+Revises: 6c0f2e8b9a17
+Create Date: 2026-10-18 23:48:05.902671
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b18f3c7d42'
+down_revision: Union[str, None] = '6c0f2e8b9a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Once partitioned, credits.id is unique only together with issuance_date. credit_ids holds
+    # every id once; the triggers below keep it in step with credits and payments reference it.
+    op.create_table('credit_ids',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Archived months count too: their ids stay taken and newer payments may refer to them.
+    # Fails on ids that are already duplicated, which have to be resolved by hand first.
+    op.execute("""
+        DO $$
+        DECLARE
+            archived record;
+        BEGIN
+            INSERT INTO credit_ids (id) SELECT id FROM credits;
+            FOR archived IN
+                SELECT namespace.nspname, class.relname
+                  FROM pg_class class
+                  JOIN pg_namespace namespace ON namespace.oid = class.relnamespace
+                 WHERE class.relkind = 'r' AND NOT class.relispartition
+                   AND class.relname ~ '^credits_y[0-9]{4}m[0-9]{2}$'
+            LOOP
+                EXECUTE format('INSERT INTO credit_ids (id) SELECT id FROM %I.%I', archived.nspname, archived.relname);
+            END LOOP;
+        END
+        $$
+    """)
+
+    # Statement triggers with transition tables: one set-based statement per INSERT or COPY.
+    # An id that is already taken by a credit with another issuance_date fails on credit_ids_pkey.
+    op.execute("""
+        CREATE FUNCTION credit_ids_insert() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO credit_ids (id) SELECT id FROM inserted;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER credit_ids_insert AFTER INSERT ON credits
+        REFERENCING NEW TABLE AS inserted FOR EACH STATEMENT EXECUTE FUNCTION credit_ids_insert()
+    """)
+    # Deleting the id cascades to payments and credit_balances, as the foreign key from payments
+    # to credits did (a user's deletion still cascades to credits through credits.user_id).
+    op.execute("""
+        CREATE FUNCTION credit_ids_delete() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            DELETE FROM credit_ids USING deleted WHERE credit_ids.id = deleted.id;
+            RETURN NULL;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER credit_ids_delete AFTER DELETE ON credits
+        REFERENCING OLD TABLE AS deleted FOR EACH STATEMENT EXECUTE FUNCTION credit_ids_delete()
+    """)
+    op.execute("""
+        CREATE FUNCTION credit_ids_reject_update() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            RAISE EXCEPTION 'credits.id cannot be changed (credit %)', OLD.id;
+        END
+        $$
+    """)
+    op.execute("""
+        CREATE TRIGGER credit_ids_reject_update BEFORE UPDATE OF id ON credits
+        FOR EACH ROW WHEN (NEW.id <> OLD.id) EXECUTE FUNCTION credit_ids_reject_update()
+    """)
+
+    op.create_foreign_key(
+        'payments_credit_id_fkey', 'payments', 'credit_ids', ['credit_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_foreign_key(
+        'credit_balances_credit_id_fkey', 'credit_balances', 'credit_ids', ['credit_id'], ['id'], ondelete='CASCADE'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('credit_balances_credit_id_fkey', 'credit_balances', type_='foreignkey')
+    op.drop_constraint('payments_credit_id_fkey', 'payments', type_='foreignkey')
+    op.execute("DROP TRIGGER credit_ids_reject_update ON credits")
+    op.execute("DROP TRIGGER credit_ids_delete ON credits")
+    op.execute("DROP TRIGGER credit_ids_insert ON credits")
+    op.execute("DROP FUNCTION credit_ids_reject_update()")
+    op.execute("DROP FUNCTION credit_ids_delete()")
+    op.execute("DROP FUNCTION credit_ids_insert()")
+    op.drop_table('credit_ids')
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+class CacheBackend:
+    # Whether calls block on I/O and have to run off the event loop.
+    blocking = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes) -> None:
+        raise NotImplementedError
+
+    def data_version(self, scope: str) -> int:
+        raise NotImplementedError
+
+    def bump_data_version(self, scope: str) -> int:
+        raise NotImplementedError
+
+    def bumped_at(self, scope: str) -> float:
+        """Wall-clock time of the scope's last bump, 0 if it never changed."""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def data_version(self, scope: str) -> int:
+        return self._versions.get(scope, 0)
+
+    def bump_data_version(self, scope: str) -> int:
+        with self._lock:
+            self._versions[scope] = self._versions.get(scope, 0) + 1
+            self._bumped_at[scope] = time.time()
+            return self._versions[scope]
+
+    def bumped_at(self, scope: str) -> float:
+        return self._bumped_at.get(scope, 0.0)
+
+
+class SQLiteCache(CacheBackend):
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_expires_at ON entries (expires_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS versions (scope TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS bumps (scope TEXT PRIMARY KEY, bumped_at REAL NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connection().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, now + self.ttl_seconds),
+        )
+        conn.execute("DELETE FROM entries WHERE expires_at < ?", (now,))
+        conn.execute(
+            "DELETE FROM entries WHERE key IN "
+            "(SELECT key FROM entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def data_version(self, scope: str) -> int:
+        row = self._connection().execute("SELECT version FROM versions WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_data_version(self, scope: str) -> int:
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO versions (scope, version) VALUES (?, 1) "
+            "ON CONFLICT (scope) DO UPDATE SET version = version + 1",
+            (scope,),
+        )
+        conn.execute("INSERT OR REPLACE INTO bumps (scope, bumped_at) VALUES (?, ?)", (scope, time.time()))
+        return self.data_version(scope)
+
+    def bumped_at(self, scope: str) -> float:
+        row = self._connection().execute("SELECT bumped_at FROM bumps WHERE scope = ?", (scope,)).fetchone()
+        return row[0] if row else 0.0
+
+
+def build_cache() -> CacheBackend:
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCache(settings.CACHE_SQLITE_PATH, settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    raise ValueError(f"Unknown CACHE_BACKEND: {settings.CACHE_BACKEND}")
+
+
+response_cache = build_cache()
+
+
+async def _call(func: Callable[..., Any], *args: Any) -> Any:
+    if response_cache.blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+async def data_version(scope: str) -> int:
+    return await _call(response_cache.data_version, scope)
+
+
+async def bump_data_version(*scopes: str) -> None:
+    for scope in scopes:
+        await _call(response_cache.bump_data_version, scope)
+
+
+def _versions(scopes: Iterable[str]) -> Tuple[Dict[str, int], bool]:
+    versions = {scope: response_cache.data_version(scope) for scope in sorted(scopes)}
+    # Replicas can still return rows from before the last change of a scope; cached under the new
+    # version (or handed out with its ETag) those would outlive the replication delay.
+    settled = not settings.DATABASE_READ_URLS.strip() or all(
+        time.time() - response_cache.bumped_at(scope) >= settings.READ_REPLICA_MAX_LAG_SECONDS for scope in versions
+    )
+    return versions, settled
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match is "*" or a comma-separated list of tags, compared weakly (the W/ prefix is ignored).
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def cached_response(
+    request: Request,
+    endpoint: str,
+    params: Dict[str, Any],
+    scopes: Iterable[str],
+    adapter: TypeAdapter,
+    compute: Callable[[], Awaitable[Any]],
+) -> Response:
+    versions, settled = await _call(_versions, scopes)
+    if not settled:
+        body = adapter.dump_json(adapter.validate_python(await compute()))
+        return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-cache"})
+
+    key = json.dumps([endpoint, params, versions], sort_keys=True, default=str)
+    etag = f'"{hashlib.sha1(key.encode("utf-8")).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = await _call(response_cache.get, key)
+    if body is None:
+        body = adapter.dump_json(adapter.validate_python(await compute()))
+        await _call(response_cache.set, key, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -10,5 +10,55 @@ class Settings(BaseSettings):
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL must be set")
 
+    # strict: refuse to start when the database is not at the Alembic head; warn: log it; off: skip.
+    SCHEMA_CHECK: str = "strict"
+    ALEMBIC_CONFIG: str = "alembic.ini"
+    STARTUP_WARM_CONNECTIONS: int = 2
+
+    # Comma separated; empty means reads use their own pool on the primary.
+    DATABASE_READ_URLS: str = ""
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    READ_POOL_SIZE: int = 10
+    READ_MAX_OVERFLOW: int = 20
+    READ_CONNECT_TIMEOUT: float = 2.0
+    READ_REPLICA_RETRY_SECONDS: float = 30.0
+    # Upper bound on replication delay: for this long after a data change, responses read from
+    # replicas are not cached.
+    READ_REPLICA_MAX_LAG_SECONDS: float = 30.0
+
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_SQLITE_PATH: str = "response_cache.sqlite3"
+
+    JOB_WORKERS: int = 4
+    JOB_TABLE_CONCURRENCY: int = 1
+    # Shared by every worker that runs jobs: a job may be picked up by another process or host.
+    JOB_SPOOL_DIR: str = "job_spool"
+    # A running job is requeued when its worker has not renewed the lease for this long.
+    JOB_LEASE_SECONDS: int = 60
+
+    PARSER_EXECUTOR: str = "thread"
+    PARSER_WORKERS: int = 2
+
+    # Uncompressed size limit for /upload/upload_archive, checked before any member is extracted.
+    ARCHIVE_MAX_UNPACKED_MB: int = 2048
+
+    PARTITION_PREMAKE_MONTHS: int = 3
+    PARTITION_MAX_SPAN_MONTHS: int = 240
+    PARTITION_ARCHIVE_SCHEMA: str = "archive"
+
+    EXPORT_PAGE_SIZE: int = 10_000
+    EXPORT_CHUNK_SIZE: int = 1_000
+
+    QUERY_BUDGET: int = 20
+    QUERY_REPEAT_THRESHOLD: int = 5
+    QUERY_BUDGET_STRICT: bool = False
+    QUERY_DEBUG_HEADERS: bool = False
+
+    # Encode large responses once with pydantic-core instead of FastAPI re-validating them.
+    FAST_SERIALIZATION: bool = False
+
 
 settings = Settings()
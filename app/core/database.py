@@ -1,18 +1,168 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Set
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.metrics import InstrumentedQueuePool, instrument_engine
+from app.core.query_budget import count_queries, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str, label: str, pool_size: int, max_overflow: int, **kwargs) -> AsyncEngine:
+    new_engine = create_async_engine(
+        url,
+        pool_pre_ping=True,
+        future=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        poolclass=InstrumentedQueuePool,
+        **kwargs,
+    )
+    instrument_engine(new_engine, label)
+    count_queries(new_engine)
+    return new_engine
 
 
-engine = create_async_engine(settings.DATABASE_URL, pool_pre_ping=True, future=True, pool_size=10, max_overflow=20)
+engine = _create_engine(settings.DATABASE_URL, "primary", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+class ReadRouter:
+    """Hands out read sessions round-robin over the replicas, skipping ones that recently failed.
+
+    Without replicas, reads still get their own pool on the primary, so analytics scans do not
+    take connections from ingestion. When every replica is down, reads fall back to the primary.
+    """
+
+    def __init__(self, replicas: List[AsyncEngine], fallback: AsyncEngine, retry_seconds: float):
+        self.replicas = replicas
+        self.fallback = fallback
+        self.retry_seconds = retry_seconds
+        self._down_until: Dict[int, float] = {}
+        self._next = itertools.cycle(range(len(replicas))) if replicas else None
+
+    def candidates(self) -> List[AsyncEngine]:
+        now = time.monotonic()
+        ordered = []
+        if self._next is not None:
+            start = next(self._next)
+            for offset in range(len(self.replicas)):
+                index = (start + offset) % len(self.replicas)
+                if self._down_until.get(index, 0) <= now:
+                    ordered.append(self.replicas[index])
+        ordered.append(self.fallback)
+        return ordered
+
+    def mark_down(self, replica: AsyncEngine) -> None:
+        if replica in self.replicas:
+            self._down_until[self.replicas.index(replica)] = time.monotonic() + self.retry_seconds
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        # Nothing is checked out until the first statement, so a request answered from the cache
+        # never takes a connection. A replica that fails to connect fails that request and is
+        # skipped by the ones after it.
+        candidate = self.candidates()[0]
+        async with AsyncSession(bind=candidate, expire_on_commit=False) as session:
+            try:
+                yield session
+            except (OSError, DBAPIError, asyncio.TimeoutError) as e:
+                if candidate in self.replicas and (not isinstance(e, DBAPIError) or e.connection_invalidated):
+                    logger.warning("Read replica %r is unavailable, skipping it for %ss",
+                                   candidate.url, self.retry_seconds)
+                    self.mark_down(candidate)
+                raise
+
+
+_replica_urls = [url.strip() for url in settings.DATABASE_READ_URLS.split(",") if url.strip()]
+
+if _replica_urls:
+    read_router = ReadRouter(
+        [
+            _create_engine(
+                url,
+                f"replica-{index}",
+                settings.READ_POOL_SIZE,
+                settings.READ_MAX_OVERFLOW,
+                connect_args={"timeout": settings.READ_CONNECT_TIMEOUT},
+            )
+            for index, url in enumerate(_replica_urls)
+        ],
+        engine,
+        settings.READ_REPLICA_RETRY_SECONDS,
+    )
+else:
+    read_router = ReadRouter(
+        [],
+        _create_engine(settings.DATABASE_URL, "primary-read", settings.READ_POOL_SIZE, settings.READ_MAX_OVERFLOW),
+        settings.READ_REPLICA_RETRY_SECONDS,
+    )
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def _script_heads() -> Set[str]:
+    # Imported here: alembic is only needed once, at startup.
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    return set(ScriptDirectory.from_config(Config(settings.ALEMBIC_CONFIG)).get_heads())
+
+
+def _database_heads(conn: Connection) -> Set[str]:
+    from alembic.runtime.migration import MigrationContext
+
+    return set(MigrationContext.configure(conn).get_current_heads())
+
+
+async def check_schema_version() -> None:
+    """Compare the database's Alembic revision with the migrations shipped with this code.
+
+    Alembic owns the schema; the app only checks it. ``SCHEMA_CHECK`` is ``strict`` (refuse to
+    start), ``warn`` (log and start anyway) or ``off``.
+    """
+    if settings.SCHEMA_CHECK == "off":
+        return
+
+    expected = await asyncio.to_thread(_script_heads)
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_database_heads)
+
+    if current != expected:
+        message = (
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"the code expects {', '.join(sorted(expected))}; run `alembic upgrade head`"
+        )
+        if settings.SCHEMA_CHECK == "strict":
+            raise SchemaVersionError(message)
+        logger.warning(message)
 
 
 async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
+    # Outside a request (jobs, scripts) this starts its own query count; inside one it joins the request's.
+    with track_queries():
+        async with AsyncSessionLocal() as session:
+            yield session
+
+
+async def get_read_db():
+    # For read-only endpoints; replicas may lag the primary by the replication delay.
+    with track_queries():
+        async with read_router.session() as session:
+            yield session
+
+
+async def dispose_engines() -> None:
+    for read_engine in {*read_router.replicas, read_router.fallback, engine}:
+        await read_engine.dispose()
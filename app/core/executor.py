@@ -0,0 +1,32 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+_executor: Optional[Executor] = None
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if settings.PARSER_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.PARSER_WORKERS)
+        elif settings.PARSER_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=settings.PARSER_WORKERS, thread_name_prefix="parser")
+        else:
+            raise ValueError(f"Unknown PARSER_EXECUTOR: {settings.PARSER_EXECUTOR}")
+    return _executor
+
+
+async def run_parser(func: Callable[..., Any], *args: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,139 @@
+import json
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+from fastapi import Depends
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bind placeholders of every paramstyle, including expanded IN lists, collapse to a single "?".
+_PLACEHOLDERS = re.compile(r"(?:\$\d+|%\(\w+\)s|%s|\?|:\w+)(?:\s*,\s*(?:\$\d+|%\(\w+\)s|%s|\?|:\w+))*")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    return " ".join(_PLACEHOLDERS.sub("?", statement).split())
+
+
+class QueryStats:
+    def __init__(self, budget: Optional[int] = None):
+        self.budget = budget
+        self.enforced = True
+        self.count = 0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        threshold = settings.QUERY_REPEAT_THRESHOLD if threshold is None else threshold
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    @property
+    def limit(self) -> int:
+        return settings.QUERY_BUDGET if self.budget is None else self.budget
+
+    def violations(self) -> dict:
+        problems = {}
+        if not self.enforced:
+            return problems
+        if self.count > self.limit:
+            problems["budget"] = self.limit
+        repeated = self.repeated()
+        if repeated:
+            problems["repeated"] = [{"statement": shape, "count": count} for shape, count in repeated]
+        return problems
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Called with (route, stats) when a request finishes; app.testing uses this to see requests
+# served on the test client's event loop thread.
+observers: List[Callable[[str, QueryStats], None]] = []
+
+
+@contextmanager
+def track_queries(budget: Optional[int] = None, fresh: bool = False) -> Iterator[QueryStats]:
+    stats = _current.get()
+    if stats is not None and not fresh:
+        yield stats
+        return
+
+    stats = QueryStats(budget)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def count_queries(engine: Union[AsyncEngine, Engine]) -> None:
+    @event.listens_for(getattr(engine, "sync_engine", engine), "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement)
+
+
+def query_budget(limit: Optional[int]):
+    """Route dependency that overrides ``QUERY_BUDGET`` for one endpoint; ``None`` turns the checks off."""
+
+    async def set_budget() -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = limit
+            stats.enforced = limit is not None
+
+    return Depends(set_budget)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(fresh=True) as stats:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    self.check(scope, stats)
+                    if settings.QUERY_DEBUG_HEADERS:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"x-query-count", str(stats.count).encode()))
+                        headers.append((b"x-query-repeated", str(len(stats.repeated())).encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                for observer in list(observers):
+                    observer(route, stats)
+
+    @staticmethod
+    def check(scope, stats: QueryStats) -> None:
+        problems = stats.violations()
+        if not problems:
+            return
+
+        route = getattr(scope.get("route"), "path", scope["path"])
+        payload = {"method": scope["method"], "route": route, "queries": stats.count, **problems}
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(json.dumps(payload, ensure_ascii=False))
+        logger.warning("Query budget exceeded: %s", json.dumps(payload, ensure_ascii=False), extra={"query_budget": payload})
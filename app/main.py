@@ -1,18 +1,38 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.core.database import init_db
-from app.routers import upload, user_credits, plans_insert, plan_perfomance
-
-app = FastAPI()
+from app.core.database import AsyncSessionLocal, check_schema_version, dispose_engines
+from app.core.executor import shutdown_executor
+from app.core.metrics import MetricsMiddleware
+from app.core.query_budget import QueryBudgetMiddleware
+from app.routers import admin, analytics, jobs, metrics, upload, user_credits, plans_insert, plan_perfomance
+from app.services.dictionary_cache import dictionary_cache
+from app.services.jobs import job_runner
+from app.services.warmup import warm_up
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    await check_schema_version()
+    async with AsyncSessionLocal() as session:
+        await dictionary_cache.load(session)
+    await warm_up(dictionary_cache)
+    await job_runner.start()
     yield
+    await job_runner.stop()
+    shutdown_executor()
+    await dispose_engines()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 app.include_router(upload.router, prefix="/upload", tags=["Upload CSV"])
 app.include_router(user_credits.router, prefix="/credits", tags=["User Credits"])
 app.include_router(plan_perfomance.router, prefix="/plan", tags=["Plan Performance"])
 app.include_router(plans_insert.router, prefix="/plan", tags=["Insert Plan"])
+app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+app.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+app.include_router(metrics.router, tags=["Metrics"])
@@ -1,7 +1,7 @@
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Optional
-from sqlalchemy import ForeignKey, Numeric, String, Float, Date
+from typing import Any, List, Optional
+from sqlalchemy import ForeignKey, Numeric, String, Float, Date, DateTime, Index, Integer, JSON, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -19,21 +19,58 @@ class User(Base):
 
 class Credit(Base):
     __tablename__ = "credits"
-
+    __table_args__ = (
+        Index("ix_credits_user_id", "user_id"),
+        Index(
+            "ix_credits_issuance_date_cover",
+            "issuance_date",
+            postgresql_include=["body", "return_date", "actual_return_date"],
+        ),
+        {"postgresql_partition_by": "RANGE (issuance_date)"},
+    )
+
+    # Monthly range partitions (app.services.partitions); the partition key has to be part of the primary key.
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
-    issuance_date: Mapped[date] = mapped_column(Date)
+    issuance_date: Mapped[date] = mapped_column(Date, primary_key=True)
     return_date: Mapped[date] = mapped_column(Date)
     actual_return_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
     body: Mapped[float] = mapped_column(Float)
     percent: Mapped[float] = mapped_column(Float)
 
     user: Mapped["User"] = relationship(back_populates="credits")
-    payments: Mapped[List["Payment"]] = relationship(back_populates="credit", cascade="all, delete-orphan")
+    payments: Mapped[List["Payment"]] = relationship(
+        back_populates="credit",
+        cascade="all, delete-orphan",
+        primaryjoin="Credit.id == foreign(Payment.credit_id)",
+    )
+
+
+class CreditId(Base):
+    """Every credit id once: credits.id alone is not unique in the partitioned table.
+
+    Kept by triggers on credits (migration e5b18f3c7d42): inserting a credit whose id is already
+    taken fails, and deleting a credit deletes its payments and balance through this table.
+    """
+
+    __tablename__ = "credit_ids"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+
+
+class PaymentId(Base):
+    """Every payment id once, for the same reason as ``CreditId``; kept by triggers on payments (0b9d4e7a2c56)."""
+
+    __tablename__ = "payment_ids"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
 
 
 class Dictionary(Base):
     __tablename__ = "dictionary"
+    __table_args__ = (
+        Index("ix_dictionary_name", "name"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(100))
@@ -41,6 +78,9 @@ class Dictionary(Base):
 
 class Plan(Base):
     __tablename__ = "plans"
+    __table_args__ = (
+        UniqueConstraint("period", "category_id", name="uq_plans_period_category"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     period: Mapped[date] = mapped_column(Date)
@@ -52,12 +92,90 @@ class Plan(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_credit_id", "credit_id", postgresql_include=["type_id", "sum"]),
+        Index("ix_payments_payment_date", "payment_date", postgresql_include=["sum"]),
+        Index("ix_payments_type_id_payment_date", "type_id", "payment_date", postgresql_include=["credit_id", "sum"]),
+        {"postgresql_partition_by": "RANGE (payment_date)"},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     sum: Mapped[Decimal] = mapped_column(Numeric(12, 2))
-    payment_date: Mapped[date] = mapped_column(Date)
-    credit_id: Mapped[int] = mapped_column(ForeignKey("credits.id", ondelete="CASCADE"))
+    payment_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    # References credit_ids: credits.id alone is not unique once credits are partitioned.
+    credit_id: Mapped[int] = mapped_column(ForeignKey("credit_ids.id", ondelete="CASCADE"))
     type_id: Mapped[int] = mapped_column(ForeignKey("dictionary.id"))
 
-    credit: Mapped["Credit"] = relationship(back_populates="payments")
+    credit: Mapped["Credit"] = relationship(
+        back_populates="payments",
+        primaryjoin="foreign(Payment.credit_id) == Credit.id",
+    )
     type: Mapped["Dictionary"] = relationship()
+
+
+class PerformanceRollup(Base):
+    __tablename__ = "performance_rollup"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    category_id: Mapped[int] = mapped_column(ForeignKey("dictionary.id", ondelete="CASCADE"), primary_key=True)
+    issued_count: Mapped[int] = mapped_column(Integer, default=0)
+    issued_body: Mapped[Decimal] = mapped_column(Numeric(16, 2), default=0)
+    collected_count: Mapped[int] = mapped_column(Integer, default=0)
+    collected_sum: Mapped[Decimal] = mapped_column(Numeric(16, 2), default=0)
+
+    category: Mapped["Dictionary"] = relationship()
+
+
+class CreditBalance(Base):
+    """Payments per credit, kept up to date by payment uploads (app.services.balances)."""
+
+    __tablename__ = "credit_balances"
+
+    # References credit_ids, for the same reason as payments.credit_id.
+    credit_id: Mapped[int] = mapped_column(
+        ForeignKey("credit_ids.id", ondelete="CASCADE"), primary_key=True, autoincrement=False
+    )
+    body_paid: Mapped[Decimal] = mapped_column(Numeric(16, 2), default=0)
+    percent_paid: Mapped[Decimal] = mapped_column(Numeric(16, 2), default=0)
+    total_paid: Mapped[Decimal] = mapped_column(Numeric(16, 2), default=0)
+    last_payment_date: Mapped[Optional[date]] = mapped_column(Date, nullable=True)
+    payment_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20))
+    table_name: Mapped[str] = mapped_column(String(50))
+    filename: Mapped[str] = mapped_column(String(255))
+    payload_path: Mapped[str] = mapped_column(String(500))
+    state: Mapped[str] = mapped_column(String(20), default="queued", index=True)
+    rows_total: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    rows_processed: Mapped[int] = mapped_column(Integer, default=0)
+    rows_per_second: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    errors: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    result: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    options: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # The worker running the job and how long its claim holds without a heartbeat.
+    owner: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class IngestionCheckpoint(Base):
+    """Progress of a chunked load, so uploading the same file again resumes after the last committed chunk."""
+
+    __tablename__ = "ingestion_checkpoints"
+
+    file_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    rows_total: Mapped[int] = mapped_column(Integer)
+    rows_committed: Mapped[int] = mapped_column(Integer, default=0)
+    chunks_committed: Mapped[int] = mapped_column(Integer, default=0)
+    state: Mapped[str] = mapped_column(String(20), default="running")
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,74 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import bump_data_version
+from app.core.database import get_db
+from app.services.balances import check_balances, rebuild_balances
+from app.services.partitions import PARTITION_KEYS, archive_partitions
+from app.services.rollup import rebuild_rollup
+
+router = APIRouter()
+
+
+@router.post("/rollup/rebuild")
+async def rebuild_performance_rollup(db: AsyncSession = Depends(get_db)):
+    try:
+        rows = await rebuild_rollup(db)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    await bump_data_version("performance_rollup")
+
+    return {"detail": f"{rows} rollup rows rebuilt"}
+
+
+@router.post("/partitions/archive")
+async def archive_old_partitions(
+    before: date = Query(..., description="Archive monthly partitions that end on or before this date."),
+    db: AsyncSession = Depends(get_db)
+):
+    archived, kept = [], []
+    try:
+        for table_name in PARTITION_KEYS:
+            table_archived, table_kept = await archive_partitions(db, table_name, before)
+            archived += table_archived
+            kept += table_kept
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    await bump_data_version(*PARTITION_KEYS)
+
+    return {
+        "detail": f"{len(archived)} partitions archived",
+        "partitions": archived,
+        # Months of credits that still hold open credits.
+        "kept": kept,
+    }
+
+
+@router.get("/balances/check")
+async def check_credit_balances(db: AsyncSession = Depends(get_db)):
+    try:
+        return await check_balances(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+
+@router.post("/balances/rebuild")
+async def rebuild_credit_balances(db: AsyncSession = Depends(get_db)):
+    try:
+        rows = await rebuild_balances(db)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    await bump_data_version("credit_balances")
+
+    return {"detail": f"{rows} credit balances rebuilt"}
@@ -0,0 +1,59 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cached_response
+from app.core.database import get_read_db
+from app.core.query_budget import query_budget
+from app.schemas.analytics_schemas import OverdueBucketOut
+from app.services.credit_queries import OVERDUE_BUCKETS, overdue_buckets_query
+from app.services.dictionary_cache import BODY_PAYMENT, DictionaryCache, get_dictionary
+
+router = APIRouter()
+
+OVERDUE_SCOPES = ("credits", "payments", "dictionary", "credit_balances")
+OVERDUE_BUCKETS_ADAPTER = TypeAdapter(List[OverdueBucketOut])
+
+
+async def overdue_buckets_summary(db: AsyncSession, dictionary: DictionaryCache, as_of: date,
+                                  group_by_month: bool) -> List[dict]:
+    # Today's book comes from the balance ledger; past dates, where most credits have later payments,
+    # aggregate the payments made by then in one pass.
+    stmt = overdue_buckets_query(
+        as_of, dictionary.id_of(BODY_PAYMENT), group_by_month, from_ledger=as_of >= date.today()
+    )
+
+    result = await db.execute(stmt)
+
+    return [
+        {
+            "bucket": OVERDUE_BUCKETS[row.bucket],
+            "issuance_month": row.issuance_month.date() if group_by_month else None,
+            "credit_count": row.credit_count,
+            "outstanding_body": float(row.outstanding_body),
+        }
+        for row in result.all()
+    ]
+
+
+@router.get("/overdue_buckets", response_model=List[OverdueBucketOut], dependencies=[query_budget(2)])
+async def get_overdue_buckets(
+    request: Request,
+    as_of: Optional[date] = Query(None, description="Defaults to today."),
+    group_by_month: bool = Query(False, description="Split every bucket by credit issuance month."),
+    db: AsyncSession = Depends(get_read_db),
+    dictionary: DictionaryCache = Depends(get_dictionary)
+) -> List[OverdueBucketOut]:
+    as_of = as_of or date.today()
+
+    return await cached_response(
+        request,
+        "overdue_buckets",
+        {"as_of": as_of, "group_by_month": group_by_month},
+        OVERDUE_SCOPES,
+        OVERDUE_BUCKETS_ADAPTER,
+        lambda: overdue_buckets_summary(db, dictionary, as_of, group_by_month),
+    )
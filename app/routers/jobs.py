@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.query_budget import query_budget
+from app.models import IngestionJob
+from app.schemas.job_schemas import JobOut
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobOut, dependencies=[query_budget(1)])
+async def get_job(job_id: str, db: AsyncSession = Depends(get_db)) -> JobOut:
+    job = await db.get(IngestionJob, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found."
+        )
+
+    return job
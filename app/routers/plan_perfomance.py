@@ -1,79 +1,47 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, func, and_, case, extract
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 
-from typing import List
-
-from app.core.database import get_db
-from app.models import Plan, Dictionary, Credit, Payment
-from app.schemas.analytics_schemas import PlansPerformanceOut, YearPerformanceOut
+from typing import List, Literal
+
+from app.core.cache import cached_response
+from app.core.database import get_read_db
+from app.core.query_budget import query_budget
+from app.schemas.analytics_schemas import PerformanceRangeOut, PlansPerformanceOut, YearPerformanceOut
+from app.services.dictionary_cache import (
+    COLLECTION_CATEGORY,
+    ISSUANCE_CATEGORY,
+    DictionaryCache,
+    get_dictionary,
+)
+from app.services.performance_queries import (
+    month_performance_query,
+    performance_range_query,
+    year_performance_query,
+)
 
 router = APIRouter()
 
+ANALYTICS_SCOPES = ("plans", "credits", "payments", "dictionary", "performance_rollup")
+MONTH_PERFORMANCE_ADAPTER = TypeAdapter(List[PlansPerformanceOut])
+YEAR_PERFORMANCE_ADAPTER = TypeAdapter(List[YearPerformanceOut])
+PERFORMANCE_RANGE_ADAPTER = TypeAdapter(List[PerformanceRangeOut])
+MAX_RANGE_DAYS = 3660
 
-@router.get("/month_performance", response_model=List[PlansPerformanceOut])
-async def get_plans_performance(
-        target_date: date = Query(...),
-        db: AsyncSession = Depends(get_db)
-) -> List[PlansPerformanceOut]:
-    start_of_month = date(target_date.year, target_date.month, 1)
-
-    payment_sum_case = func.sum(
-        case(
-            (Dictionary.name == "збір", Payment.sum),
-            else_=0
-        )
-    )
-
-    credit_sum_case = func.sum(
-        case(
-            (Dictionary.name == "видача", Credit.body),
-            else_=0
-        )
-    )
 
-    stmt = (
-        select(
-            Plan.period,
-            Dictionary.name.label("category"),
-            Plan.sum.label("plan_sum"),
-            payment_sum_case.label("actual_sum_payment"),
-            credit_sum_case.label("actual_sum_credit"),
-        )
-        .join(Dictionary, Plan.category_id == Dictionary.id)
-        .outerjoin(
-            Payment,
-            and_(
-                Dictionary.name == "збір",
-                Payment.payment_date >= start_of_month,
-                Payment.payment_date <= target_date,
-            ),
-        )
-        .outerjoin(
-            Credit,
-            and_(
-                Dictionary.name == "видача",
-                Credit.issuance_date >= start_of_month,
-                Credit.issuance_date <= target_date,
-            ),
-        )
-        .where(
-            Plan.period >= start_of_month,
-            Plan.period <= target_date,
-        )
-        .group_by(Plan.period, Dictionary.name, Plan.sum)
-        .order_by(Plan.period)
-    )
+async def month_performance_summary(db: AsyncSession, dictionary: DictionaryCache, target_date: date) -> List[dict]:
+    stmt = month_performance_query(target_date)
 
     result = await db.execute(stmt)
     rows = result.fetchall()
 
     summary = []
     for row in rows:
-        if row.category == "збір":
+        category = dictionary.name_of(row.category_id)
+        if category == COLLECTION_CATEGORY:
             actual_sum = float(row.actual_sum_payment or 0)
-        elif row.category == "видача":
+        elif category == ISSUANCE_CATEGORY:
             actual_sum = float(row.actual_sum_credit or 0)
         else:
             actual_sum = 0.0
@@ -82,7 +50,7 @@ async def get_plans_performance(
 
         summary.append({
             "month": row.period,
-            "category": row.category,
+            "category": category,
             "plan_sum": float(row.plan_sum),
             "actual_sum": actual_sum,
             "performance_percent": round(percent, 2),
@@ -91,63 +59,11 @@ async def get_plans_performance(
     return summary
 
 
-@router.get("/year_performance", response_model=List[YearPerformanceOut])
-async def get_year_summary(
-    year: int = Query(...),
-    db: AsyncSession = Depends(get_db)
-) -> List[YearPerformanceOut]:
-    plan_subquery = (
-        select(
-            extract("month", Plan.period).label("month"),
-            func.sum(
-                case((Dictionary.name == "видача", Plan.sum), else_=0)
-            ).label("plan_credit_sum"),
-            func.sum(
-                case((Dictionary.name == "збір", Plan.sum), else_=0)
-            ).label("plan_payment_sum")
-        )
-        .join(Dictionary, Plan.category_id == Dictionary.id)
-        .where(extract("year", Plan.period) == year)
-        .group_by(extract("month", Plan.period))
-        .subquery()
-    )
-
-    stmt = (
-        select(
-            plan_subquery.c.month,
-            func.count(func.distinct(Credit.id)).label("credit_count"),
-            plan_subquery.c.plan_credit_sum,
-            func.sum(
-                case((Dictionary.name == "видача", Credit.body), else_=0)
-            ).label("actual_credit_sum"),
-            func.count(func.distinct(Payment.id)).label("payment_count"),
-            plan_subquery.c.plan_payment_sum,
-            func.sum(
-                case((Dictionary.name == "збір", Payment.sum), else_=0)
-            ).label("actual_payment_sum"),
-        )
-        .select_from(Plan)
-        .join(Dictionary, Plan.category_id == Dictionary.id)
-        .outerjoin(
-            Credit,
-            and_(
-                Dictionary.name == "видача",
-                extract("year", Credit.issuance_date) == year,
-                extract("month", Credit.issuance_date) == extract("month", Plan.period),
-            )
-        )
-        .outerjoin(
-            Payment,
-            and_(
-                Dictionary.name == "збір",
-                extract("year", Payment.payment_date) == year,
-                extract("month", Payment.payment_date) == extract("month", Plan.period),
-            )
-        )
-        .join(plan_subquery, extract("month", Plan.period) == plan_subquery.c.month)
-        .where(extract("year", Plan.period) == year)
-        .group_by(plan_subquery.c.month, plan_subquery.c.plan_credit_sum, plan_subquery.c.plan_payment_sum)
-        .order_by(plan_subquery.c.month)
+async def year_performance_summary(db: AsyncSession, dictionary: DictionaryCache, year: int) -> List[dict]:
+    stmt = year_performance_query(
+        year,
+        dictionary.id_of(ISSUANCE_CATEGORY),
+        dictionary.id_of(COLLECTION_CATEGORY),
     )
 
     result = await db.execute(stmt)
@@ -164,7 +80,7 @@ async def get_year_summary(
         payment_percent = (payment_actual / payment_plan * 100) if payment_plan else 0
 
         summary.append({
-            "month": f"{year}-{int(row.month):02d}",
+            "month": f"{year}-{row.month.month:02d}",
             "credit_count": row.credit_count,
             "plan_credit_sum": credit_plan,
             "actual_credit_sum": credit_actual,
@@ -191,3 +107,82 @@ async def get_year_summary(
     return summary
 
 
+async def performance_range_summary(db: AsyncSession, dictionary: DictionaryCache, start: date, end: date,
+                                    granularity: str) -> List[dict]:
+    stmt = performance_range_query(
+        start,
+        end,
+        granularity,
+        dictionary.id_of(ISSUANCE_CATEGORY),
+        dictionary.id_of(COLLECTION_CATEGORY),
+    )
+
+    result = await db.execute(stmt)
+
+    # Percentages and shares are computed by the query, rows map onto the schema as they are.
+    return [row._asdict() for row in result.all()]
+
+
+@router.get("/month_performance", response_model=List[PlansPerformanceOut], dependencies=[query_budget(2)])
+async def get_plans_performance(
+        request: Request,
+        target_date: date = Query(...),
+        db: AsyncSession = Depends(get_read_db),
+        dictionary: DictionaryCache = Depends(get_dictionary)
+) -> List[PlansPerformanceOut]:
+    return await cached_response(
+        request,
+        "month_performance",
+        {"target_date": target_date},
+        ANALYTICS_SCOPES,
+        MONTH_PERFORMANCE_ADAPTER,
+        lambda: month_performance_summary(db, dictionary, target_date),
+    )
+
+
+@router.get("/year_performance", response_model=List[YearPerformanceOut], dependencies=[query_budget(2)])
+async def get_year_summary(
+    request: Request,
+    year: int = Query(...),
+    db: AsyncSession = Depends(get_read_db),
+    dictionary: DictionaryCache = Depends(get_dictionary)
+) -> List[YearPerformanceOut]:
+    return await cached_response(
+        request,
+        "year_performance",
+        {"year": year},
+        ANALYTICS_SCOPES,
+        YEAR_PERFORMANCE_ADAPTER,
+        lambda: year_performance_summary(db, dictionary, year),
+    )
+
+
+@router.get("/performance_range", response_model=List[PerformanceRangeOut], dependencies=[query_budget(2)])
+async def get_performance_range(
+    request: Request,
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    granularity: Literal["month", "week"] = Query("month"),
+    db: AsyncSession = Depends(get_read_db),
+    dictionary: DictionaryCache = Depends(get_dictionary)
+) -> List[PerformanceRangeOut]:
+    if end < start:
+        raise HTTPException(
+            status_code=400,
+            detail="'to' must not be earlier than 'from'."
+        )
+
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range is limited to {MAX_RANGE_DAYS} days."
+        )
+
+    return await cached_response(
+        request,
+        "performance_range",
+        {"from": start, "to": end, "granularity": granularity},
+        ANALYTICS_SCOPES,
+        PERFORMANCE_RANGE_ADAPTER,
+        lambda: performance_range_summary(db, dictionary, start, end, granularity),
+    )
@@ -1,84 +1,59 @@
-import io
-import pandas as pd
-from typing import Literal
-from datetime import datetime
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, UploadFile, File, Depends, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.models import User, Credit, Dictionary, Plan, Payment
-from app.schemas.model_schemas import UserCSV, CreditCSV, DictionaryCSV, PlanCSV, PaymentCSV
+from app.core.query_budget import query_budget
+from app.services.archive import ingest_archive
+from app.services.ingestion import ingest_table
+from app.services.jobs import ARCHIVE_JOB, TABLE_JOBS, job_runner
+from app.services.parsers import detect_format
 
 router = APIRouter()
 
-VALID_TABLES = ["users", "credits", "dictionary", "plans", "payments"]
 
-
-@router.post("/upload_csv/{table_name}")
+@router.post("/upload_csv/{table_name}", dependencies=[query_budget(None)])
 async def upload_csv(
     table_name: Literal["users", "credits", "dictionary", "plans", "payments"],
     file: UploadFile = File(...),
+    background: bool = Query(True),
+    format: Optional[Literal["tsv", "parquet", "arrow"]] = Query(
+        None, description="Detected from the file extension or contents when omitted."
+    ),
+    chunk_size: Optional[int] = Query(
+        None, gt=0, description="Commit every chunk_size rows; the load resumes if the same file is uploaded again."
+    ),
+    on_conflict: Literal["update", "nothing"] = Query(
+        "update", description="For chunked loads: what to do with rows whose primary key already exists."
+    ),
+    restart: bool = Query(False, description="For chunked loads: ignore the checkpoint and start over."),
     db: AsyncSession = Depends(get_db)
 ):
     content = await file.read()
-    try:
-        df = pd.read_csv(io.StringIO(content.decode('utf-8')), sep='\t')
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error reading CSV: {e}")
-
-    model_mapping = {
-        "users": User,
-        "credits": Credit,
-        "dictionary": Dictionary,
-        "plans": Plan,
-        "payments": Payment
-    }
-
-    schema_mapping = {
-        "users": UserCSV,
-        "credits": CreditCSV,
-        "dictionary": DictionaryCSV,
-        "plans": PlanCSV,
-        "payments": PaymentCSV
-    }
-
-    model = model_mapping.get(table_name.lower())
-    schema = schema_mapping.get(table_name.lower())
-
-    if not model or not schema:
-        raise HTTPException(status_code=400, detail="Invalid table name.")
+    file_format = format or detect_format(file.filename, content)
+    options = {"chunk_size": chunk_size, "on_conflict": on_conflict, "restart": restart} if chunk_size else None
 
-    records = df.to_dict(orient='records')
-    instances = []
-    validation_errors = []
+    if background:
+        job = await job_runner.submit(db, TABLE_JOBS[file_format], table_name, file.filename, content, options)
+        return JSONResponse(status_code=202, content={"job_id": job.id, "status_url": f"/jobs/{job.id}"})
 
-    for idx, record in enumerate(records, start=2):
-        for key, value in record.items():
-            if pd.isna(value):
-                record[key] = None
-            elif isinstance(value, str) and ("date" in key.lower() or "period" in key.lower()):
-                try:
-                    record[key] = datetime.strptime(value, "%d.%m.%Y").date()
-                except Exception:
-                    pass
+    return await ingest_table(db, table_name, content, file_format=file_format, **(options or {}))
 
-        try:
-            validated_data = schema(**record)
-            instance = model(**validated_data.dict())
-            instances.append(instance)
-        except Exception as e:
-            validation_errors.append(f"Row {idx}: {str(e)}")
 
-    if validation_errors:
-        raise HTTPException(status_code=400, detail=validation_errors)
-
-    if not instances:
-        raise HTTPException(status_code=400, detail="No valid records to upload.")
+@router.post("/upload_archive", dependencies=[query_budget(None)])
+async def upload_archive(
+    file: UploadFile = File(..., description="A zip or tar archive with one file per table, named after it."),
+    background: bool = Query(True),
+    atomic: bool = Query(
+        False, description="Load every table in one transaction; otherwise each table commits and is reported on its own."
+    ),
+    db: AsyncSession = Depends(get_db)
+):
+    content = await file.read()
 
-    db.add_all(instances)
-    await db.commit()
+    if background:
+        job = await job_runner.submit(db, ARCHIVE_JOB, ARCHIVE_JOB, file.filename, content, {"atomic": atomic})
+        return JSONResponse(status_code=202, content={"job_id": job.id, "status_url": f"/jobs/{job.id}"})
 
-    return {
-        "message": f"Successfully uploaded {len(instances)} records to {table_name}.",
-        "note": "Available tables: users, credits, dictionary, plans, payments"
-    }
+    return await ingest_archive(db, content, atomic=atomic)
@@ -1,60 +1,147 @@
-from fastapi import APIRouter, Depends, HTTPException
+import base64
+import binascii
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 from datetime import date
-from typing import List
+from typing import AsyncIterator, List, Literal, Optional, Union
 
-from app.core.database import get_db
-from app.models import Credit, Payment
+from app.core.config import settings
+from app.core.database import get_read_db, read_router
+from app.core.query_budget import query_budget
+from app.core.serialization import fast_response
 from app.schemas.analytics_schemas import UserCreditInfo, OpenCreditInfo, ClosedCreditInfo
+from app.services.credit_queries import credit_export_page_query, user_credits_query
 
 router = APIRouter()
 
+EXPORT_COLUMNS = [
+    "credit_id", "user_id", "issuance_date", "is_closed", "return_date", "overdue_days", "body", "percent",
+    "total_payments", "body_payments", "percent_payments", "cursor",
+]
 
-@router.get("/user_credits/{user_id}", response_model=List[UserCreditInfo])
-async def get_user_credits(user_id: int, db: AsyncSession = Depends(get_db)) -> List[UserCreditInfo]:
-    result = await db.execute(select(Credit).where(Credit.user_id == user_id))
-    credits = result.scalars().all()
 
-    if not credits:
+def credit_info(row) -> UserCreditInfo:
+    if row.actual_return_date:
+        return ClosedCreditInfo(
+            issuance_date=row.issuance_date,
+            is_closed=True,
+            return_date=row.actual_return_date,
+            body=row.body,
+            percent=row.percent,
+            total_payments=row.total_payments
+        )
+
+    return OpenCreditInfo(
+        issuance_date=row.issuance_date,
+        is_closed=False,
+        return_date=row.return_date,
+        overdue_days=row.overdue_days,
+        body=row.body,
+        percent=row.percent,
+        body_payments=row.body_payments,
+        percent_payments=row.percent_payments
+    )
+
+
+def encode_cursor(credit_id: int) -> str:
+    return base64.urlsafe_b64encode(str(credit_id).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cursor."
+        )
+
+
+async def export_rows(after_id: int, today: date) -> AsyncIterator[List[dict]]:
+    # The response outlives the request's dependencies, so the export opens its own session.
+    # Every page is its own short read transaction; the cursor on each row makes it resumable.
+    async with read_router.session() as session:
+        while True:
+            stmt = credit_export_page_query(after_id, settings.EXPORT_PAGE_SIZE, today)
+            result = await session.stream(stmt, execution_options={"yield_per": settings.EXPORT_CHUNK_SIZE})
+            page_rows = 0
+            async for partition in result.partitions():
+                chunk = []
+                for row in partition:
+                    chunk.append({
+                        "credit_id": row.id,
+                        "user_id": row.user_id,
+                        **credit_info(row).model_dump(mode="json"),
+                        "cursor": encode_cursor(row.id),
+                    })
+                page_rows += len(partition)
+                after_id = partition[-1].id
+                yield chunk
+            await session.rollback()
+
+            if page_rows < settings.EXPORT_PAGE_SIZE:
+                break
+
+
+async def ndjson_lines(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[Union[str, bytes]]:
+    async for chunk in chunks:
+        if settings.FAST_SERIALIZATION:
+            yield b"".join(to_json(record) + b"\n" for record in chunk)
+        else:
+            yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in chunk)
+
+
+async def csv_lines(chunks: AsyncIterator[List[dict]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    async for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/user_credits/{user_id}", response_model=List[UserCreditInfo], dependencies=[query_budget(2)])
+async def get_user_credits(
+    user_id: int,
+    db: AsyncSession = Depends(get_read_db)
+) -> List[UserCreditInfo]:
+    stmt = user_credits_query(user_id, date.today())
+
+    result = await db.execute(stmt)
+    rows = result.all()
+
+    if not rows:
         raise HTTPException(
             status_code=404,
             detail="User not found or no credits available."
         )
 
-    response = []
-    today = date.today()
-    for credit in credits:
-        result = await db.execute(select(Payment).where(Payment.credit_id == credit.id))
-        payments = result.scalars().all()
-
-        if credit.actual_return_date:
-            total_payments = sum(payment.sum for payment in payments)
-            credit_info = ClosedCreditInfo(
-                issuance_date=credit.issuance_date,
-                is_closed=True,
-                return_date=credit.actual_return_date,
-                body=credit.body,
-                percent=credit.percent,
-                total_payments=total_payments
-            )
-        else:
-            overdue_days = (today - credit.return_date).days if today > credit.return_date else 0
-            body_payments = sum(p.sum for p in payments if p.type_id == 1)
-            percent_payments = sum(p.sum for p in payments if p.type_id == 2)
+    return fast_response([credit_info(row) for row in rows])
 
-            credit_info = OpenCreditInfo(
-                issuance_date=credit.issuance_date,
-                is_closed=False,
-                return_date=credit.return_date,
-                overdue_days=overdue_days,
-                body=credit.body,
-                percent=credit.percent,
-                body_payments=body_payments,
-                percent_payments=percent_payments
-            )
 
-        response.append(credit_info)
+@router.get("/export", dependencies=[query_budget(None)])
+async def export_credits(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    cursor: Optional[str] = Query(None, description="Resume after the row that carried this cursor.")
+) -> StreamingResponse:
+    chunks = export_rows(decode_cursor(cursor), date.today())
 
-    return response
+    if format == "csv":
+        return StreamingResponse(
+            csv_lines(chunks),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="credits.csv"'},
+        )
 
+    return StreamingResponse(ndjson_lines(chunks), media_type="application/x-ndjson")
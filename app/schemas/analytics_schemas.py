@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import date
-from typing import Union
+from typing import Optional, Union
 
 
 class BaseCreditInfo(BaseModel):
@@ -49,3 +49,24 @@ class YearPerformanceOut(BaseModel):
     payment_performance_percent: float
     credit_share_percent_of_year: float
     payment_share_percent_of_year: float
+
+
+class PerformanceRangeOut(BaseModel):
+    period: date
+    credit_count: int
+    plan_credit_sum: float
+    actual_credit_sum: float
+    credit_performance_percent: float
+    payment_count: int
+    plan_payment_sum: float
+    actual_payment_sum: float
+    payment_performance_percent: float
+    credit_share_percent: float
+    payment_share_percent: float
+
+
+class OverdueBucketOut(BaseModel):
+    bucket: str
+    issuance_month: Optional[date] = None
+    credit_count: int
+    outstanding_body: float
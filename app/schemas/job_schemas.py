@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from pydantic import BaseModel
+
+
+class JobOut(BaseModel):
+    id: str
+    kind: str
+    table_name: str
+    filename: str
+    state: str
+    rows_total: Optional[int]
+    rows_processed: int
+    rows_per_second: Optional[float]
+    errors: Optional[List[Any]]
+    result: Optional[Any]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,234 @@
+import asyncio
+import io
+import os
+import tarfile
+import time
+import zipfile
+from typing import Callable, Dict, List, Set, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import bump_data_version
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import record_ingestion
+from app.services.dictionary_cache import dictionary_cache
+from app.services.ingestion import Progress, load_rows, parse_upload, write_rows
+from app.services.parsers import MODEL_MAPPING, detect_format
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _members(content: bytes) -> List[Tuple[str, int, Callable[[], bytes]]]:
+    if zipfile.is_zipfile(io.BytesIO(content)):
+        archive = zipfile.ZipFile(io.BytesIO(content))
+        return [(info.filename, info.file_size, lambda info=info: archive.read(info))
+                for info in archive.infolist() if not info.is_dir()]
+
+    try:
+        archive = tarfile.open(fileobj=io.BytesIO(content), mode="r:*")
+    except tarfile.TarError:
+        raise ArchiveError("The file is not a zip or tar archive.")
+    return [(info.name, info.size, lambda info=info: archive.extractfile(info).read())
+            for info in archive.getmembers() if info.isfile()]
+
+
+def read_archive(content: bytes) -> Dict[str, Tuple[str, bytes]]:
+    """Map each table name to the archive member named after it, as ``(filename, content)``.
+
+    Members are matched by file name without extension (``users.tsv``, ``feed/payments.parquet``);
+    directories and hidden files are skipped, anything else is an error.
+    """
+    members = _members(content)
+    unpacked = sum(size for _, size, _ in members)
+    if unpacked > settings.ARCHIVE_MAX_UNPACKED_MB * 1024 * 1024:
+        raise ArchiveError(f"The archive unpacks to {unpacked} bytes, over ARCHIVE_MAX_UNPACKED_MB.")
+
+    files: Dict[str, Tuple[str, bytes]] = {}
+    unknown = []
+    for name, _, read in members:
+        filename = os.path.basename(name)
+        if not filename or filename.startswith(".") or "__MACOSX" in name:
+            continue
+        table_name = os.path.splitext(filename)[0].lower()
+        if table_name not in MODEL_MAPPING:
+            unknown.append(name)
+        elif table_name in files:
+            raise ArchiveError(f"More than one file for {table_name}: {files[table_name][0]}, {filename}.")
+        else:
+            files[table_name] = (filename, read())
+
+    if unknown:
+        raise ArchiveError(f"Files that do not match a table: {', '.join(unknown)}. "
+                           f"Available tables: {', '.join(MODEL_MAPPING)}.")
+    if not files:
+        raise ArchiveError("The archive has no table files.")
+    return files
+
+
+# References the metadata does not show: payments.credit_id points at credit_ids, which the
+# triggers on credits fill, so payments still have to wait for credits.
+LOGICAL_DEPENDENCIES = {
+    "payments": {"credits"},
+}
+
+
+def dependencies(table_names: Set[str]) -> Dict[str, Set[str]]:
+    # Only references between tables in the upload matter; the rest are already in the database.
+    return {
+        table_name: (
+            {foreign_key.column.table.name for foreign_key in MODEL_MAPPING[table_name].__table__.foreign_keys}
+            | LOGICAL_DEPENDENCIES.get(table_name, set())
+        ) & table_names - {table_name}
+        for table_name in table_names
+    }
+
+
+def load_order(table_names: Set[str]) -> List[List[str]]:
+    """Group tables into levels that only reference tables of earlier levels."""
+    depends_on = dependencies(table_names)
+    levels: List[List[str]] = []
+    loaded: Set[str] = set()
+    while len(loaded) < len(table_names):
+        level = sorted(name for name in table_names - loaded if depends_on[name] <= loaded)
+        if not level:
+            raise ArchiveError(f"Circular foreign keys between {', '.join(sorted(table_names - loaded))}.")
+        levels.append(level)
+        loaded.update(level)
+    return levels
+
+
+async def ingest_archive(db: AsyncSession, content: bytes, progress: Progress = None, atomic: bool = False) -> dict:
+    """Load every table file of a zip or tar archive, in foreign key order.
+
+    The files of the next level are parsed while the current one is written. With ``atomic``
+    everything is written in one transaction on ``db``, one table after another, and any error
+    rolls the whole batch back. Otherwise every table commits on its own session, the tables of a
+    level load concurrently, and the result reports each table; a table whose dependency failed
+    is skipped.
+    """
+    try:
+        files = await asyncio.to_thread(read_archive, content)
+        levels = load_order(set(files))
+    except (ArchiveError, tarfile.TarError, zipfile.BadZipFile) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    parsing: Dict[str, asyncio.Task] = {}
+
+    def parse_level(index: int) -> None:
+        if index < len(levels):
+            # Largest first: the parser pool is FIFO and the biggest file is what the level waits on.
+            for table_name in sorted(levels[index], key=lambda name: len(files[name][1]), reverse=True):
+                filename, data = files[table_name]
+                parsing[table_name] = asyncio.create_task(
+                    parse_upload(table_name, data, detect_format(filename, data))
+                )
+
+    parse_level(0)
+    try:
+        if atomic:
+            tables = await _load_atomic(db, levels, parsing, parse_level, progress)
+        else:
+            tables = await _load_by_level(levels, parsing, parse_level, progress)
+    finally:
+        for task in parsing.values():
+            task.cancel()
+        await asyncio.gather(*parsing.values(), return_exceptions=True)
+
+    loaded = [table_name for table_name, result in tables.items() if result["status"] == "loaded"]
+    return {
+        "message": f"Loaded {len(loaded)} of {len(tables)} tables.",
+        "atomic": atomic,
+        "order": levels,
+        "rows": sum(tables[table_name]["rows"] for table_name in loaded),
+        "tables": tables,
+    }
+
+
+def _parsed_rows(parsing: Dict[str, asyncio.Task]) -> int:
+    # The total grows as files finish parsing; nothing else knows the row counts up front.
+    return sum(
+        len(task.result()[1]) for task in parsing.values()
+        if task.done() and not task.cancelled() and task.exception() is None
+    )
+
+
+async def _load_atomic(db: AsyncSession, levels: List[List[str]], parsing: Dict[str, asyncio.Task],
+                       parse_level, progress: Progress) -> Dict[str, dict]:
+    tables: Dict[str, dict] = {}
+    processed = 0
+    try:
+        for index, level in enumerate(levels):
+            parse_level(index + 1)
+            for table_name in level:
+                try:
+                    columns, rows, validation_errors = await parsing[table_name]
+                except HTTPException as e:
+                    raise HTTPException(status_code=e.status_code, detail=f"{table_name}: {e.detail}")
+                if validation_errors:
+                    raise HTTPException(status_code=400,
+                                        detail=[f"{table_name}: {error}" for error in validation_errors])
+                if not rows:
+                    raise HTTPException(status_code=400, detail=f"{table_name}: No valid records to upload.")
+
+                started = time.perf_counter()
+                inserted = await write_rows(db, table_name, columns, rows)
+                tables[table_name] = {"status": "loaded", "rows": inserted,
+                                      "seconds": round(time.perf_counter() - started, 3)}
+                processed += inserted
+                if progress:
+                    await progress(processed, _parsed_rows(parsing))
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        dictionary_cache.invalidate()
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    await bump_data_version(*tables)
+    for table_name, result in tables.items():
+        record_ingestion(table_name, result["rows"], result["seconds"])
+    return tables
+
+
+async def _load_table(table_name: str, parsing: asyncio.Task) -> dict:
+    try:
+        columns, rows, validation_errors = await parsing
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            result = await load_rows(session, table_name, columns, rows, validation_errors)
+    except HTTPException as e:
+        return {"status": "failed", "rows": 0, "errors": e.detail if isinstance(e.detail, list) else [e.detail]}
+    return {"status": "loaded", "rows": result["rows"], "seconds": round(time.perf_counter() - started, 3)}
+
+
+async def _load_by_level(levels: List[List[str]], parsing: Dict[str, asyncio.Task], parse_level,
+                         progress: Progress) -> Dict[str, dict]:
+    depends_on = dependencies({table_name for level in levels for table_name in level})
+    tables: Dict[str, dict] = {}
+    processed = 0
+    for index, level in enumerate(levels):
+        parse_level(index + 1)
+        runnable = []
+        for table_name in level:
+            missing = sorted(
+                dependency for dependency in depends_on[table_name] if tables[dependency]["status"] != "loaded"
+            )
+            if missing:
+                tables[table_name] = {"status": "skipped", "rows": 0,
+                                      "errors": [f"Not loaded because {', '.join(missing)} failed."]}
+            else:
+                runnable.append(table_name)
+
+        # Each table on its own pooled connection and transaction.
+        results = await asyncio.gather(*(_load_table(table_name, parsing[table_name]) for table_name in runnable))
+        for table_name, result in zip(runnable, results):
+            tables[table_name] = result
+            processed += result["rows"]
+        if progress:
+            await progress(processed, _parsed_rows(parsing))
+    return tables
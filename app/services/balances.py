@@ -0,0 +1,154 @@
+import asyncio
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import CreditBalance, Payment
+from app.services.dictionary_cache import BODY_PAYMENT, PERCENT_PAYMENT, dictionary_cache
+from app.services.partitions import with_archived
+
+UPSERT_BATCH_SIZE = 1_000
+BALANCE_COLUMNS = ["credit_id", "body_paid", "percent_paid", "total_paid", "last_payment_date", "payment_count"]
+# How many mismatching credits a consistency check lists.
+MAX_REPORTED_MISMATCHES = 100
+CENT = Decimal("0.01")
+
+
+def _aggregate(
+    rows: List[Tuple[Any, ...]],
+    columns: Sequence[str],
+    body_type_id: Optional[int],
+    percent_type_id: Optional[int],
+) -> Dict[int, List]:
+    credit_index, sum_index = columns.index("credit_id"), columns.index("sum")
+    date_index, type_index = columns.index("payment_date"), columns.index("type_id")
+
+    totals = defaultdict(lambda: [Decimal(0), Decimal(0), Decimal(0), None, 0])
+    for row in rows:
+        balance = totals[row[credit_index]]
+        # payments.sum is NUMERIC(12,2), so each amount counts as Postgres stored it.
+        amount = Decimal(str(row[sum_index])).quantize(CENT, ROUND_HALF_UP)
+        if row[type_index] == body_type_id:
+            balance[0] += amount
+        elif row[type_index] == percent_type_id:
+            balance[1] += amount
+        balance[2] += amount
+        if balance[3] is None or row[date_index] > balance[3]:
+            balance[3] = row[date_index]
+        balance[4] += 1
+    return totals
+
+
+async def apply_payments(db: AsyncSession, columns: Sequence[str], rows: List[Tuple[Any, ...]]) -> None:
+    """Add newly inserted payments to their credits' balances, in the caller's transaction."""
+    dictionary = await dictionary_cache.ensure_loaded(db)
+    totals = await asyncio.to_thread(
+        _aggregate, rows, columns, dictionary.id_of(BODY_PAYMENT), dictionary.id_of(PERCENT_PAYMENT)
+    )
+    values = [
+        {"credit_id": credit_id, "body_paid": body, "percent_paid": percent, "total_paid": total,
+         "last_payment_date": last_date, "payment_count": count}
+        for credit_id, (body, percent, total, last_date, count) in totals.items()
+    ]
+
+    if not values:
+        return
+
+    table = CreditBalance.__table__
+    stmt = pg_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.credit_id],
+        set_={
+            **{
+                column: table.c[column] + stmt.excluded[column]
+                for column in ("body_paid", "percent_paid", "total_paid", "payment_count")
+            },
+            "last_payment_date": func.greatest(table.c.last_payment_date, stmt.excluded.last_payment_date),
+        },
+    )
+    # One statement compiled once and sent as executemany; a multi-row VALUES per batch costs
+    # more to compile than to run.
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        await db.execute(stmt, values[start:start + UPSERT_BATCH_SIZE])
+
+
+async def _balances_from_payments(db: AsyncSession, credit_ids: Optional[List[int]] = None) -> Select:
+    dictionary = await dictionary_cache.ensure_loaded(db)
+    # Archived months are detached from payments, but their amounts stay in the ledger (and in the
+    # totals users see).
+    payments = (await with_archived(db, Payment.__table__, ["credit_id", "sum", "payment_date", "type_id"])).c
+    stmt = select(
+        payments.credit_id,
+        func.coalesce(
+            func.sum(payments.sum).filter(payments.type_id == dictionary.id_of(BODY_PAYMENT)), 0
+        ).label("body_paid"),
+        func.coalesce(
+            func.sum(payments.sum).filter(payments.type_id == dictionary.id_of(PERCENT_PAYMENT)), 0
+        ).label("percent_paid"),
+        func.sum(payments.sum).label("total_paid"),
+        func.max(payments.payment_date).label("last_payment_date"),
+        func.count().label("payment_count"),
+    ).group_by(payments.credit_id)
+    if credit_ids is not None:
+        stmt = stmt.where(payments.credit_id.in_(credit_ids))
+    return stmt
+
+
+async def refresh_balances(db: AsyncSession, credit_ids: Iterable[int]) -> None:
+    # Recomputed from payments rather than added to, for loads that may update existing payments.
+    # A credit whose payments all moved to another credit loses its balance row.
+    credit_ids = sorted(set(credit_ids))
+    if not credit_ids:
+        return
+
+    await db.execute(delete(CreditBalance).where(CreditBalance.credit_id.in_(credit_ids)))
+    source = await _balances_from_payments(db, credit_ids)
+    await db.execute(CreditBalance.__table__.insert().from_select(BALANCE_COLUMNS, source))
+
+
+async def rebuild_balances(db: AsyncSession) -> int:
+    await db.execute(delete(CreditBalance))
+    result = await db.execute(
+        CreditBalance.__table__.insert().from_select(BALANCE_COLUMNS, await _balances_from_payments(db))
+    )
+    return result.rowcount
+
+
+async def check_balances(db: AsyncSession) -> dict:
+    """Compare every balance with a fresh aggregate over payments and report the credits that differ."""
+    source = (await _balances_from_payments(db)).subquery()
+    expected = source.c
+    ledger = CreditBalance.__table__.c
+
+    mismatch = or_(
+        ledger.credit_id.is_(None),
+        expected["credit_id"].is_(None),
+        *(ledger[column].is_distinct_from(expected[column]) for column in BALANCE_COLUMNS[1:]),
+    )
+    stmt = (
+        select(
+            func.coalesce(ledger.credit_id, expected["credit_id"]).label("credit_id"),
+            ledger.credit_id.is_not(None).label("in_ledger"),
+            expected["credit_id"].is_not(None).label("in_payments"),
+            func.count().over().label("mismatches"),
+        )
+        .select_from(CreditBalance.__table__.join(source, ledger.credit_id == expected["credit_id"], full=True))
+        .where(mismatch)
+        .order_by("credit_id")
+        .limit(MAX_REPORTED_MISMATCHES)
+    )
+    rows = (await db.execute(stmt)).all()
+    checked = await db.scalar(select(func.count()).select_from(CreditBalance))
+
+    return {
+        "checked": checked,
+        "mismatches": rows[0].mismatches if rows else 0,
+        "credits": [
+            {"credit_id": row.credit_id, "in_ledger": row.in_ledger, "in_payments": row.in_payments}
+            for row in rows
+        ],
+    }
@@ -0,0 +1,153 @@
+from typing import Any, List, Sequence, Tuple
+
+from sqlalchemy import (
+    Row,
+    Table,
+    and_,
+    column,
+    exists,
+    func,
+    insert,
+    select,
+    table as table_clause,
+    text,
+    update as sa_update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.partitions import PARTITION_KEYS, ensure_partitions_for_rows
+
+INSERT_BATCH_SIZE = 10_000
+
+
+async def bulk_insert(
+    db: AsyncSession,
+    table: Table,
+    columns: Sequence[str],
+    rows: List[Tuple[Any, ...]],
+) -> int:
+    if not rows:
+        return 0
+
+    # Monthly partitions have to exist before rows for those months can be routed to them.
+    await ensure_partitions_for_rows(db, table.name, columns, rows)
+
+    conn = await db.connection()
+
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        raw_connection = await conn.get_raw_connection()
+        # The dialect sends BEGIN only before its own first statement; a COPY that came first
+        # would run outside the session's transaction and survive its rollback.
+        if not raw_connection.driver_connection.is_in_transaction():
+            await conn.execute(text("SELECT 1"))
+        await raw_connection.driver_connection.copy_records_to_table(
+            table.name,
+            records=rows,
+            columns=list(columns),
+        )
+        return len(rows)
+
+    stmt = insert(table)
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        await conn.execute(stmt, [dict(zip(columns, row)) for row in batch])
+
+    return len(rows)
+
+
+def upsert_key(table: Table) -> List[str]:
+    # The primary key of a partitioned table includes its partition key, but a row is still the
+    # same row when only its date changes, so those tables match rows on id alone.
+    if table.name in PARTITION_KEYS:
+        return ["id"]
+    return [key_column.name for key_column in table.primary_key.columns]
+
+
+async def upsert_rows(
+    db: AsyncSession,
+    table: Table,
+    columns: Sequence[str],
+    rows: List[Tuple[Any, ...]],
+    update: bool,
+    previous: Sequence[str] = (),
+) -> Tuple[int, int, List[Row]]:
+    """Insert ``rows``, updating (or, without ``update``, keeping) the existing row with the same ``upsert_key``.
+
+    Rows must be unique on that key. Returns the number of inserted and updated rows, and the
+    ``previous`` columns of the updated rows as they were before the update.
+    """
+    if not rows:
+        return 0, 0, []
+
+    await ensure_partitions_for_rows(db, table.name, columns, rows)
+
+    conn = await db.connection()
+    key = upsert_key(table)
+
+    # COPY cannot resolve conflicts, so the chunk goes into a staging table first and is merged
+    # with one INSERT ... SELECT; the staging table goes away with the transaction.
+    staging = f"staging_{table.name}"
+    await conn.execute(text(f"CREATE TEMP TABLE {staging} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    source = table_clause(staging, *(column(name) for name in columns))
+
+    if conn.dialect.driver == "asyncpg":
+        raw_connection = await conn.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            staging,
+            records=rows,
+            columns=list(columns),
+        )
+    else:
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            batch = rows[start:start + INSERT_BATCH_SIZE]
+            await conn.execute(insert(source), [dict(zip(columns, row)) for row in batch])
+
+    match = and_(*(source.c[name] == table.c[name] for name in key))
+    replaced = []
+    if update and previous:
+        replaced = (await conn.execute(
+            select(*(table.c[name] for name in previous)).select_from(source).join(table, match)
+        )).all()
+
+    # RETURNING xmax cannot tell inserts from updates on a partitioned table, so the rows that
+    # already exist are counted up front.
+    existing = await conn.scalar(select(func.count()).select_from(source).join(table, match))
+
+    if table.name in PARTITION_KEYS:
+        # No unique index can cover id without the partition key, so there is no ON CONFLICT on
+        # id: existing rows are updated by id (an UPDATE moves a row whose date changed to its
+        # new partition) and only the rest are inserted.
+        if update:
+            await conn.execute(
+                sa_update(table).where(match).values({name: source.c[name] for name in columns if name not in key})
+            )
+        result = await conn.execute(
+            insert(table).from_select(list(columns), select(*source.c).where(~exists().where(match)))
+        )
+        return result.rowcount, existing if update else 0, replaced
+
+    stmt = pg_insert(table).from_select(list(columns), select(*source.c))
+    if update:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key,
+            set_={name: stmt.excluded[name] for name in columns if name not in key},
+        )
+        await conn.execute(stmt)
+        return len(rows) - existing, existing, replaced
+
+    stmt = stmt.on_conflict_do_nothing(index_elements=key)
+    result = await conn.execute(stmt)
+    return result.rowcount, 0, replaced
+
+
+async def sync_id_sequence(db: AsyncSession, table: Table) -> None:
+    conn = await db.connection()
+    if conn.dialect.name != "postgresql" or "id" not in table.columns:
+        return
+
+    # CSV rows carry explicit ids, so the serial sequence has to catch up with them.
+    await conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+        f"COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) FROM {table.name}"
+    ))
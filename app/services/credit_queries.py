@@ -0,0 +1,122 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Select, case, func, literal, or_, select
+from sqlalchemy.types import Date
+
+from app.models import Credit, CreditBalance, Payment
+
+
+def credit_summary_query(today: date) -> Select:
+    as_of = literal(today, Date)
+
+    # One balance row per credit, so this is a join on the ledger's key instead of an aggregate over payments.
+    return (
+        select(
+            Credit.id,
+            Credit.user_id,
+            Credit.issuance_date,
+            Credit.return_date,
+            Credit.actual_return_date,
+            Credit.body,
+            Credit.percent,
+            func.coalesce(CreditBalance.total_paid, 0).label("total_payments"),
+            func.coalesce(CreditBalance.body_paid, 0).label("body_payments"),
+            func.coalesce(CreditBalance.percent_paid, 0).label("percent_payments"),
+            case((Credit.return_date < as_of, as_of - Credit.return_date), else_=0).label("overdue_days"),
+        )
+        .outerjoin(CreditBalance, CreditBalance.credit_id == Credit.id)
+        .order_by(Credit.id)
+    )
+
+
+def user_credits_query(user_id: int, today: date) -> Select:
+    return credit_summary_query(today).where(Credit.user_id == user_id)
+
+
+def credit_export_page_query(after_id: int, page_size: int, today: date) -> Select:
+    # Keyset page: walks the primary key index, so every page costs the same however deep it is.
+    return (
+        credit_summary_query(today)
+        .where(Credit.id > after_id)
+        .limit(page_size)
+    )
+
+
+OVERDUE_BUCKETS = ("0", "1-30", "31-90", "90+")
+
+
+def overdue_buckets_query(
+    as_of: date,
+    body_type_id: Optional[int],
+    by_issuance_month: bool = False,
+    from_ledger: bool = False,
+) -> Select:
+    """Open credits on ``as_of`` by days overdue, with the body still outstanding.
+
+    ``from_ledger`` reads body paid from ``credit_balances``, which holds every payment loaded so far.
+    A credit with a payment dated after ``as_of`` sums its own payments up to then instead, so the
+    result is the same either way; the ledger pays off when few credits have such payments, as for
+    today's book.
+    """
+    as_of_date = literal(as_of, Date)
+
+    if from_ledger:
+        paid_by_then = (
+            select(func.coalesce(func.sum(Payment.sum), 0))
+            .where(
+                Payment.credit_id == CreditBalance.credit_id,
+                Payment.type_id == body_type_id,
+                Payment.payment_date <= as_of,
+            )
+            .scalar_subquery()
+        )
+        body_paid = select(
+            CreditBalance.credit_id,
+            case(
+                (CreditBalance.last_payment_date <= as_of_date, CreditBalance.body_paid),
+                else_=paid_by_then,
+            ).label("body_paid"),
+        ).subquery()
+    else:
+        body_paid = (
+            select(Payment.credit_id, func.sum(Payment.sum).label("body_paid"))
+            .where(Payment.type_id == body_type_id, Payment.payment_date <= as_of)
+            .group_by(Payment.credit_id)
+            .subquery()
+        )
+
+    overdue_days = as_of_date - Credit.return_date
+    # A credit is in the book on as_of if it was issued by then and not yet returned.
+    open_credits = (
+        select(
+            case(
+                (Credit.return_date >= as_of_date, 0),
+                (overdue_days <= 30, 1),
+                (overdue_days <= 90, 2),
+                else_=3,
+            ).label("bucket"),
+            func.date_trunc("month", Credit.issuance_date).label("issuance_month"),
+            func.greatest(Credit.body - func.coalesce(body_paid.c.body_paid, 0), 0).label("outstanding"),
+        )
+        .outerjoin(body_paid, body_paid.c.credit_id == Credit.id)
+        .where(
+            Credit.issuance_date <= as_of,
+            or_(Credit.actual_return_date.is_(None), Credit.actual_return_date > as_of),
+        )
+        .subquery()
+    )
+
+    columns = [open_credits.c.bucket]
+    if by_issuance_month:
+        columns.insert(0, open_credits.c.issuance_month)
+
+    return (
+        select(
+            *columns,
+            func.count().label("credit_count"),
+            func.coalesce(func.sum(open_credits.c.outstanding), 0).label("outstanding_body"),
+        )
+        .group_by(*columns)
+        .order_by(*columns)
+    )
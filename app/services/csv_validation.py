@@ -0,0 +1,302 @@
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple, Type, Union, get_args, get_origin
+
+from annotated_types import Gt
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+
+CSV_DATE_FORMAT = "%d.%m.%Y"
+FIRST_ROW_NUMBER = 2
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def _is_date_column(name: str) -> bool:
+    return "date" in name.lower() or "period" in name.lower()
+
+
+def _parse_date_columns(df: "pd.DataFrame") -> Dict[str, "pd.Series"]:
+    import pandas as pd
+
+    return {
+        column: pd.to_datetime(df[column], format=CSV_DATE_FORMAT, errors="coerce")
+        for column in df.columns
+        if _is_date_column(column) and df[column].dtype == object
+    }
+
+
+def _unwrap(annotation: Any) -> Tuple[Any, bool]:
+    if get_origin(annotation) is Union:
+        args = get_args(annotation)
+        return next(arg for arg in args if arg is not type(None)), type(None) in args
+    return annotation, False
+
+
+def csv_dtypes(schema: Type[BaseModel]) -> Dict[str, type]:
+    """``read_csv`` dtypes: money columns are kept as text, so they become exact ``Decimal`` values."""
+    return {name: str for name, field in schema.model_fields.items() if _unwrap(field.annotation)[0] is Decimal}
+
+
+def _check_column(
+    series: "pd.Series",
+    nulls: "np.ndarray",
+    annotation: Any,
+    parsed_date: "Optional[pd.Series]",
+) -> Tuple["np.ndarray", "np.ndarray", "Optional[np.ndarray]"]:
+    """Type-check a whole column: returns the values to keep, a mask of the cells it cannot take and,
+    for numeric columns, the values as floats for the bound checks.
+
+    Anything not clearly valid is flagged rather than rejected, and goes to Pydantic.
+    """
+    import numpy as np
+    import pandas as pd
+
+    kind = series.dtype.kind
+    flagged = np.zeros(len(series), dtype=bool)
+    values = series.to_numpy()
+    numbers = None
+
+    if annotation in (int, float, Decimal) and kind in "iufO":
+        numbers = values.astype(float) if kind != "O" else pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+        flagged = ~nulls & np.isnan(numbers)
+        if annotation is int and kind != "i":
+            flagged |= ~nulls & (numbers % 1 != 0)
+            values = np.where(nulls | flagged, 0, numbers).astype(np.int64)
+        elif annotation is Decimal:
+            flagged |= ~nulls & np.isinf(numbers)
+    elif annotation is str and kind == "O":
+        pass
+    elif annotation is date and parsed_date is not None:
+        # Values that are not in dd.mm.yyyy are left to Pydantic, which also takes ISO dates.
+        flagged = ~nulls & parsed_date.isna().to_numpy()
+        values = parsed_date.to_numpy().astype("datetime64[D]")
+    elif annotation is date and kind == "M":
+        values = values.astype("datetime64[D]")
+    else:
+        flagged = ~nulls
+
+    return values, flagged, numbers
+
+
+def _python_values(values: "np.ndarray", annotation: Any, nulls: "np.ndarray") -> List[Any]:
+    import numpy as np
+
+    if annotation is Decimal:
+        # Text from read_csv as it is (its only non-text cells are NaN nulls, replaced below);
+        # floats through repr, which is what Pydantic does.
+        converted = list(map(Decimal, values.tolist() if values.dtype == object else map(repr, values.tolist())))
+    elif annotation is float:
+        converted = values.astype(float).tolist() if values.dtype == object else values.tolist()
+    else:
+        # int64 and datetime64[D] arrays come out as int and date objects.
+        converted = values.tolist()
+    for position in np.flatnonzero(nulls):
+        converted[position] = None
+    return converted
+
+
+def validate_frame(
+    df: "pd.DataFrame",
+    schema: Type[BaseModel],
+    columns: Sequence[str],
+) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+    """Validate and convert a whole frame column by column.
+
+    Every column is type-checked once with vectorized masks, and the ``gt`` bounds and the plan
+    period rule are checked the same way. Rows that pass become tuples straight from the converted
+    columns; only the rows a mask flagged go through the list-level ``TypeAdapter``, which either
+    accepts them (an ISO date, say) or gives Pydantic's message for them. Rows are numbered as in
+    the spreadsheet, the header being row 1.
+    """
+    import numpy as np
+    import pandas as pd
+
+    row_numbers = np.arange(FIRST_ROW_NUMBER, FIRST_ROW_NUMBER + len(df))
+    row_errors: Dict[int, List[str]] = {}
+    parsed_dates = _parse_date_columns(df)
+    fields = schema.model_fields
+
+    flagged = np.zeros(len(df), dtype=bool)
+    invalid = np.zeros(len(df), dtype=bool)
+    checked = {}
+    checks = []
+
+    for name in columns:
+        annotation, nullable = _unwrap(fields[name].annotation)
+        # A missing column is all nulls, so required fields send every row to Pydantic's "Field required".
+        series = df[name] if name in df.columns else pd.Series(np.nan, index=df.index)
+        nulls = series.isna().to_numpy()
+        values, column_flagged, numbers = _check_column(series, nulls, annotation, parsed_dates.get(name))
+        if not nullable:
+            column_flagged |= nulls
+        flagged |= column_flagged
+        checked[name] = (values, annotation, nulls)
+
+        if numbers is not None:
+            for constraint in fields[name].metadata:
+                if isinstance(constraint, Gt):
+                    checks.append((name, numbers <= constraint.gt, f"Input should be greater than {constraint.gt}"))
+
+    if "period" in fields and "period" in parsed_dates:
+        period = parsed_dates["period"]
+        checks.append((
+            "period",
+            (period.notna() & (period.dt.day != 1)).to_numpy(),
+            "Period must be the first day of the month",
+        ))
+
+    for field, mask, message in checks:
+        for row_number in row_numbers[mask]:
+            row_errors.setdefault(int(row_number), []).append(f"{field}: {message}")
+        invalid |= mask
+
+    passed = ~flagged & ~invalid
+    rows: List[Tuple[Any, ...]] = list(zip(*(
+        _python_values(values[passed], annotation, nulls[passed])
+        for values, annotation, nulls in checked.values()
+    )))
+
+    retry = flagged & ~invalid
+    if retry.any():
+        subset = df.loc[retry].astype(object)
+        subset = subset.where(subset.notna(), None)
+        for name, parsed in parsed_dates.items():
+            dates = parsed[retry]
+            subset[name] = pd.Series(dates.dt.date, index=subset.index, dtype=object).where(dates.notna(), subset[name])
+        retry_row_numbers = row_numbers[retry]
+
+        retried = []
+        adapter = _list_adapter(schema)
+        getter = attrgetter(*columns)
+        # Validated one by one so that the rows Pydantic accepts are kept next to the ones it rejects.
+        for row_number, record in zip(retry_row_numbers, subset.to_dict(orient="records")):
+            try:
+                retried.append((row_number, getter(adapter.validate_python([record])[0])))
+            except ValidationError as e:
+                for error in e.errors():
+                    _, *field = error["loc"]
+                    location = ".".join(str(part) for part in field)
+                    row_errors.setdefault(int(row_number), []).append(f"{location}: {error['msg']}")
+
+        if retried:
+            order = np.argsort(np.concatenate([row_numbers[passed], [number for number, _ in retried]]), kind="stable")
+            combined = rows + [row for _, row in retried]
+            rows = [combined[index] for index in order]
+
+    errors = [
+        f"Row {row_number}: {'; '.join(messages)}"
+        for row_number, messages in sorted(row_errors.items())
+    ]
+
+    return rows, errors
+
+
+def arrow_type(annotation: Any) -> "pa.DataType":
+    import pyarrow as pa
+
+    if get_origin(annotation) is Union:
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    return {
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        date: pa.date32(),
+        # Matches the Numeric(12, 2) money columns.
+        Decimal: pa.decimal128(12, 2),
+    }[annotation]
+
+
+def _round_money(column: "pa.ChunkedArray", expected: "pa.DataType") -> "pa.ChunkedArray":
+    # Postgres stores NUMERIC(12, 2) text like a TSV upload's rounded half away from zero
+    # (1.005 -> 1.01). A plain cast works on a float's binary value (1.00499...), refuses a
+    # decimal with more places and any int64, so everything goes through a wide decimal and the
+    # same rounding first; floats through their shortest decimal form, as repr() and Postgres print them.
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pa.types.is_floating(column.type) or pa.types.is_string(column.type):
+        column = column.cast(pa.string()).cast(pa.decimal256(76, 38))
+    elif pa.types.is_integer(column.type):
+        column = column.cast(pa.decimal256(76, 38))
+    if pa.types.is_decimal(column.type) and column.type.scale > expected.scale:
+        column = pc.round(column, ndigits=expected.scale, round_mode="half_towards_infinity")
+    return column
+
+
+def validate_arrow_table(
+    table: "pa.Table",
+    schema: Type[BaseModel],
+    columns: Sequence[str],
+) -> Tuple[List[Tuple[Any, ...]], List[str]]:
+    """Column-wise counterpart of ``validate_frame`` for Parquet and Arrow uploads.
+
+    Columns are cast to the schema's types in one go, so a column of the wrong type is reported
+    once instead of per row. Nulls in required fields, ``gt`` bounds and the plan period rule are
+    checked per row; rows are numbered from 1, as there is no header line.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    fields = schema.model_fields
+    missing = [name for name in columns if name not in table.column_names]
+    if missing:
+        return [], [f"Missing columns: {', '.join(missing)}"]
+
+    errors: List[str] = []
+    typed = {}
+    for name in columns:
+        expected = arrow_type(fields[name].annotation)
+        try:
+            column = table.column(name)
+            if pa.types.is_decimal(expected):
+                column = _round_money(column, expected)
+            typed[name] = column.cast(expected)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+            errors.append(f"{name}: expected {expected}, got {table.column(name).type} ({e})")
+    if errors:
+        return [], errors
+
+    row_numbers = np.arange(1, table.num_rows + 1)
+    row_errors: Dict[int, List[str]] = {}
+    invalid = np.zeros(table.num_rows, dtype=bool)
+    checks = []
+
+    for name in columns:
+        column = typed[name]
+        if fields[name].is_required() and get_origin(fields[name].annotation) is not Union:
+            checks.append((name, pc.is_null(column), "Field required"))
+        for constraint in fields[name].metadata:
+            if isinstance(constraint, Gt):
+                checks.append((name, pc.less_equal(column, constraint.gt), f"Input should be greater than {constraint.gt}"))
+
+    if "period" in typed:
+        checks.append(("period", pc.not_equal(pc.day(typed["period"]), 1), "Period must be the first day of the month"))
+
+    for field, mask, message in checks:
+        mask = mask.to_numpy(zero_copy_only=False)
+        # Comparisons against nulls give nulls, which are reported by the null check already.
+        mask = np.asarray(mask == True)  # noqa: E712
+        for row_number in row_numbers[mask]:
+            row_errors.setdefault(int(row_number), []).append(f"{field}: {message}")
+        invalid |= mask
+
+    valid = pa.array(~invalid)
+    rows = list(zip(*(typed[name].filter(valid).to_pylist() for name in columns)))
+
+    errors = [
+        f"Row {row_number}: {'; '.join(messages)}"
+        for row_number, messages in sorted(row_errors.items())
+    ]
+
+    return rows, errors
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Dict, Optional
+
+from fastapi import Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import data_version
+from app.core.database import get_db
+from app.models import Dictionary
+
+BODY_PAYMENT = "тіло"
+PERCENT_PAYMENT = "відсотки"
+ISSUANCE_CATEGORY = "видача"
+COLLECTION_CATEGORY = "збір"
+
+
+class DictionaryCache:
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._loaded = False
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    async def loaded(self) -> bool:
+        # Dictionary uploads bump the shared data version, so other workers notice them too.
+        return self._loaded and self._version == await data_version("dictionary")
+
+    async def load(self, db: AsyncSession) -> "DictionaryCache":
+        self._version = await data_version("dictionary")
+        result = await db.execute(select(Dictionary.id, Dictionary.name))
+        rows = result.all()
+        self._ids = {name: entry_id for entry_id, name in rows}
+        self._names = {entry_id: name for entry_id, name in rows}
+        self._loaded = True
+        return self
+
+    async def ensure_loaded(self, db: AsyncSession) -> "DictionaryCache":
+        if not await self.loaded():
+            async with self._lock:
+                if not await self.loaded():
+                    await self.load(db)
+        return self
+
+    def invalidate(self) -> None:
+        self._loaded = False
+
+    def id_of(self, name: str) -> Optional[int]:
+        return self._ids.get(name)
+
+    def name_of(self, entry_id: int) -> Optional[str]:
+        return self._names.get(entry_id)
+
+
+dictionary_cache = DictionaryCache()
+
+
+async def get_dictionary(db: AsyncSession = Depends(get_db)) -> DictionaryCache:
+    return await dictionary_cache.ensure_loaded(db)
@@ -0,0 +1,354 @@
+import asyncio
+import hashlib
+import time
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Table, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import bump_data_version
+from app.core.executor import run_parser
+from app.core.metrics import record_ingestion
+from app.models import IngestionCheckpoint, Plan
+from app.services.balances import apply_payments, rebuild_balances, refresh_balances
+from app.services.bulk_insert import bulk_insert, sync_id_sequence, upsert_key, upsert_rows
+from app.services.dictionary_cache import dictionary_cache
+from app.services.parsers import MODEL_MAPPING, CSVReadError, parse_plan_workbook, parse_table
+from app.services.rollup import apply_upload, refresh_days
+
+Progress = Optional[Callable[[int, int], Awaitable[None]]]
+
+# Chunked loads report bad rows instead of failing on them; this caps how many are listed.
+MAX_REPORTED_ERRORS = 1_000
+
+
+async def ingest_table(db: AsyncSession, table_name: str, content: bytes, progress: Progress = None,
+                       file_format: str = "tsv", chunk_size: Optional[int] = None, on_conflict: str = "update",
+                       restart: bool = False) -> dict:
+    model = MODEL_MAPPING.get(table_name)
+
+    if not model:
+        raise HTTPException(status_code=400, detail="Invalid table name.")
+
+    columns, rows, validation_errors = await parse_upload(table_name, content, file_format)
+
+    if chunk_size:
+        return await ingest_chunked(
+            db, model.__table__, content, columns, rows, validation_errors, chunk_size,
+            on_conflict == "update", restart, progress,
+        )
+
+    return await load_rows(db, table_name, columns, rows, validation_errors, progress)
+
+
+async def parse_upload(table_name: str, content: bytes,
+                       file_format: str = "tsv") -> Tuple[List[str], List[Tuple[Any, ...]], List[str]]:
+    try:
+        return await run_parser(parse_table, table_name, content, file_format)
+    except CSVReadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def write_rows(db: AsyncSession, table_name: str, columns: Sequence[str],
+                     rows: List[Tuple[Any, ...]]) -> int:
+    """Insert parsed rows and everything derived from them, without committing."""
+    model = MODEL_MAPPING[table_name]
+    inserted = await bulk_insert(db, model.__table__, columns, rows)
+    await sync_id_sequence(db, model.__table__)
+    await apply_upload(db, table_name, columns, rows)
+    if table_name == "payments":
+        await apply_payments(db, columns, rows)
+    elif table_name == "dictionary":
+        # Balances split payments by type, so new type names change them.
+        await rebuild_balances(db)
+    return inserted
+
+
+async def load_rows(db: AsyncSession, table_name: str, columns: Sequence[str], rows: List[Tuple[Any, ...]],
+                    validation_errors: List[str], progress: Progress = None) -> dict:
+    if validation_errors:
+        raise HTTPException(status_code=400, detail=validation_errors)
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="No valid records to upload.")
+
+    if progress:
+        await progress(0, len(rows))
+
+    started = time.perf_counter()
+    try:
+        inserted = await write_rows(db, table_name, columns, rows)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        if table_name == "dictionary":
+            dictionary_cache.invalidate()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    elapsed = time.perf_counter() - started
+    await bump_data_version(table_name)
+    record_ingestion(table_name, inserted, elapsed)
+
+    if progress:
+        await progress(inserted, len(rows))
+
+    return {
+        "message": f"Successfully uploaded {inserted} records to {table_name}.",
+        "rows": inserted,
+        "rows_per_second": round(inserted / elapsed) if elapsed else inserted,
+        "note": "Available tables: users, credits, dictionary, plans, payments"
+    }
+
+
+def _dedupe(rows: List[Tuple[Any, ...]], key_indexes: Sequence[int]) -> List[Tuple[Any, ...]]:
+    # ON CONFLICT cannot touch the same row twice in one statement; the last occurrence wins.
+    unique = {}
+    for row in rows:
+        unique[tuple(row[index] for index in key_indexes)] = row
+    return list(unique.values())
+
+
+async def _checkpoint(db: AsyncSession, file_hash: str, table_name: str, rows_total: int,
+                      restart: bool) -> IngestionCheckpoint:
+    stmt = pg_insert(IngestionCheckpoint).values(
+        file_hash=file_hash, table_name=table_name, rows_total=rows_total, rows_committed=0,
+        chunks_committed=0, state="running", created_at=datetime.utcnow(), updated_at=datetime.utcnow(),
+    )
+    if restart:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IngestionCheckpoint.file_hash, IngestionCheckpoint.table_name],
+            set_={"rows_total": rows_total, "rows_committed": 0, "chunks_committed": 0, "state": "running",
+                  "error": None, "updated_at": datetime.utcnow()},
+        )
+    else:
+        stmt = stmt.on_conflict_do_nothing()
+    await db.execute(stmt)
+    checkpoint = await db.get(IngestionCheckpoint, (file_hash, table_name), populate_existing=True)
+    await db.commit()
+    return checkpoint
+
+
+async def ingest_chunked(
+    db: AsyncSession,
+    table: Table,
+    content: bytes,
+    columns: Sequence[str],
+    rows: List[Tuple[Any, ...]],
+    validation_errors: List[str],
+    chunk_size: int,
+    update_existing: bool,
+    restart: bool = False,
+    progress: Progress = None,
+) -> dict:
+    """Load ``rows`` in transactions of ``chunk_size`` rows, resolving conflicts on ``upsert_key``.
+
+    Invalid rows are skipped and reported rather than failing the load. Every chunk commits
+    together with its checkpoint, keyed by the file's hash, so after a failure the same file
+    uploaded again carries on after the last committed chunk.
+    """
+    table_name = table.name
+    key_indexes = [list(columns).index(name) for name in upsert_key(table)]
+    rows = await asyncio.to_thread(_dedupe, rows, key_indexes)
+    if not rows:
+        raise HTTPException(
+            status_code=400,
+            detail=validation_errors[:MAX_REPORTED_ERRORS] or "No valid records to upload."
+        )
+
+    file_hash = await asyncio.to_thread(lambda: hashlib.sha256(content).hexdigest())
+    checkpoint = await _checkpoint(db, file_hash, table_name, len(rows), restart)
+    if checkpoint.rows_total != len(rows):
+        raise HTTPException(
+            status_code=409,
+            detail="The checkpoint for this file was made with different rows; upload with restart=true.",
+        )
+
+    resumed_from = checkpoint.rows_committed
+    committed = resumed_from
+    chunk_index = checkpoint.chunks_committed
+    day_column = {"credits": "issuance_date", "payments": "payment_date"}.get(table_name)
+    day_index = list(columns).index(day_column) if day_column else None
+    credit_index = list(columns).index("credit_id") if table_name == "payments" else None
+    # An updated row may have had another date, and an updated payment another credit; both have
+    # to be refreshed too.
+    previous = [name for name in (day_column, "credit_id") if name in columns]
+    chunks: List[Dict[str, Any]] = []
+    inserted_total = updated_total = 0
+
+    if progress:
+        await progress(committed, len(rows))
+
+    for start in range(resumed_from, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        started = time.perf_counter()
+        try:
+            # Locks the checkpoint, so two loads of the same file cannot commit the same chunk.
+            current = await db.scalar(
+                select(IngestionCheckpoint.rows_committed)
+                .where(IngestionCheckpoint.file_hash == file_hash, IngestionCheckpoint.table_name == table_name)
+                .with_for_update()
+            )
+            if current != start:
+                raise HTTPException(status_code=409, detail="This file is being loaded by another upload.")
+
+            inserted, updated, replaced = await upsert_rows(db, table, columns, chunk, update_existing, previous)
+            if day_index is not None:
+                days = {row[day_index] for row in chunk} | {getattr(old, day_column) for old in replaced}
+                await refresh_days(db, table_name, days)
+            if credit_index is not None:
+                await refresh_balances(db, {row[credit_index] for row in chunk} | {old.credit_id for old in replaced})
+
+            await db.execute(
+                update(IngestionCheckpoint)
+                .where(IngestionCheckpoint.file_hash == file_hash, IngestionCheckpoint.table_name == table_name)
+                .values(rows_committed=start + len(chunk), chunks_committed=chunk_index + 1,
+                        updated_at=datetime.utcnow())
+            )
+            await db.commit()
+        except HTTPException:
+            await db.rollback()
+            raise
+        except Exception as e:
+            await db.rollback()
+            if table_name == "dictionary":
+                dictionary_cache.invalidate()
+            await db.execute(
+                update(IngestionCheckpoint)
+                .where(IngestionCheckpoint.file_hash == file_hash, IngestionCheckpoint.table_name == table_name)
+                .values(state="failed", error=str(e), updated_at=datetime.utcnow())
+            )
+            await db.commit()
+            if committed > resumed_from:
+                await bump_data_version(table_name)
+            raise HTTPException(
+                status_code=500,
+                detail=f"Database error in chunk {chunk_index}: {str(e)}. {committed} of {len(rows)} rows "
+                       f"are committed; upload the same file again to resume.",
+            )
+
+        elapsed = time.perf_counter() - started
+        record_ingestion(table_name, len(chunk), elapsed)
+        chunks.append({"chunk": chunk_index, "rows": len(chunk), "inserted": inserted, "updated": updated,
+                       "seconds": round(elapsed, 3)})
+        inserted_total += inserted
+        updated_total += updated
+        committed = start + len(chunk)
+        chunk_index += 1
+
+        if progress:
+            await progress(committed, len(rows))
+
+    try:
+        await sync_id_sequence(db, table)
+        if table_name == "dictionary":
+            await apply_upload(db, table_name, columns, rows)
+            await rebuild_balances(db)
+        await db.execute(
+            update(IngestionCheckpoint)
+            .where(IngestionCheckpoint.file_hash == file_hash, IngestionCheckpoint.table_name == table_name)
+            .values(state="completed", error=None, updated_at=datetime.utcnow())
+        )
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    await bump_data_version(table_name)
+
+    if resumed_from == len(rows):
+        message = f"Every record of this file is already in {table_name}; upload with restart=true to load it again."
+    else:
+        message = f"Loaded {committed - resumed_from} records into {table_name} in {len(chunks)} chunks."
+
+    return {
+        "message": message,
+        "rows": committed - resumed_from,
+        "rows_total": len(rows),
+        "resumed_from": resumed_from,
+        "inserted": inserted_total,
+        "updated": updated_total,
+        "skipped": committed - resumed_from - inserted_total - updated_total,
+        "chunks": chunks,
+        "error_count": len(validation_errors),
+        "errors": validation_errors[:MAX_REPORTED_ERRORS],
+    }
+
+
+async def ingest_plans(db: AsyncSession, content: bytes, progress: Progress = None) -> dict:
+    dictionary = await dictionary_cache.ensure_loaded(db)
+
+    parsed_rows, errors = await run_parser(parse_plan_workbook, content)
+
+    category_names = {category_name for _, _, category_name, _ in parsed_rows}
+    if any(dictionary.id_of(category_name) is None for category_name in category_names):
+        await dictionary.load(db)
+
+    plans_to_insert = {}
+    for idx, parsed_date, category_name, amount in parsed_rows:
+        category_id = dictionary.id_of(category_name)
+        if category_id is None:
+            errors.append(f"Row {idx}: category not found")
+            continue
+
+        plans_to_insert.setdefault((parsed_date, category_id), amount)
+
+    if errors:
+        raise HTTPException(
+            status_code=400,
+            detail=errors
+        )
+
+    if progress:
+        await progress(0, len(plans_to_insert))
+
+    if not plans_to_insert:
+        return _plans_result(0, [])
+
+    # Plans that already exist are the ones ON CONFLICT DO NOTHING does not return, so no
+    # lookup has to bind every (period, category) pair up front.
+    stmt = (
+        pg_insert(Plan)
+        .on_conflict_do_nothing(index_elements=[Plan.period, Plan.category_id])
+        .returning(Plan.period, Plan.category_id)
+    )
+
+    started = time.perf_counter()
+    try:
+        # executemany with RETURNING is sent as batched multi-row INSERTs, which keeps big
+        # workbooks under the driver's bind parameter limit.
+        result = await db.execute(stmt, [
+            {"period": period, "category_id": category_id, "sum": amount}
+            for (period, category_id), amount in plans_to_insert.items()
+        ])
+        inserted_keys = {(row.period, row.category_id) for row in result}
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Database error: {str(e)}"
+        )
+
+    inserted = len(inserted_keys)
+    duplicates = [key for key in plans_to_insert if key not in inserted_keys]
+    await bump_data_version("plans")
+    record_ingestion("plans", inserted, time.perf_counter() - started)
+
+    if progress:
+        await progress(inserted, inserted)
+
+    return _plans_result(inserted, duplicates)
+
+
+def _plans_result(inserted: int, duplicates: List[Tuple[date, int]]) -> dict:
+    # Plans that already exist are skipped, not errors; they are listed like the skipped rows of chunked loads.
+    return {
+        "detail": f"{inserted} plans inserted",
+        "rows": inserted,
+        "duplicate_count": len(duplicates),
+        "duplicates": [
+            {"period": period.isoformat(), "category_id": category_id}
+            for period, category_id in duplicates[:MAX_REPORTED_ERRORS]
+        ],
+    }
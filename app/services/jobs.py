@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import IngestionJob
+from app.services.archive import ingest_archive
+from app.services.ingestion import ingest_plans, ingest_table
+
+logger = logging.getLogger(__name__)
+
+CSV_JOB = "csv"
+PARQUET_JOB = "parquet"
+ARROW_JOB = "arrow"
+PLANS_WORKBOOK_JOB = "plans_workbook"
+ARCHIVE_JOB = "archive"
+
+# Table upload jobs by file format.
+TABLE_JOBS = {"tsv": CSV_JOB, "parquet": PARQUET_JOB, "arrow": ARROW_JOB}
+JOB_FORMATS = {kind: file_format for file_format, kind in TABLE_JOBS.items()}
+
+
+class JobRunner:
+    def __init__(self, workers: int, table_concurrency: int, spool_dir: str, lease_seconds: int):
+        self.workers = workers
+        self.table_concurrency = table_concurrency
+        self.spool_dir = spool_dir
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queue: Optional[asyncio.Queue] = None
+        # Jobs in this runner's queue or waiting for their table, so polling does not queue them twice.
+        self._pending: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._table_limits: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.table_concurrency)
+        )
+
+    async def start(self) -> None:
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._queue = asyncio.Queue()
+
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(IngestionJob.id)
+                .where(IngestionJob.state == "queued")
+                .order_by(IngestionJob.created_at)
+            )
+            for job_id in result.scalars():
+                self._enqueue(job_id)
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._recover_forever()))
+
+    def _enqueue(self, job_id: str) -> None:
+        if job_id not in self._pending:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    def _lease_end(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+
+    async def _recover(self) -> None:
+        # Only jobs whose worker stopped renewing the lease go back to the queue; jobs that other
+        # workers are still running keep going. Every worker may queue the same job, the claim
+        # lets one of them run it.
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(IngestionJob)
+                .where(
+                    IngestionJob.state == "running",
+                    or_(IngestionJob.lease_expires_at.is_(None), IngestionJob.lease_expires_at < now),
+                )
+                .values(state="queued", owner=None, lease_expires_at=None)
+                .returning(IngestionJob.id)
+            )
+            job_ids = result.scalars().all()
+            await session.commit()
+
+            # Queued jobs live in the memory of the process that took the upload; if that process
+            # died, they are only in the table. Any job still queued after a lease is picked up.
+            stale = await session.execute(
+                select(IngestionJob.id)
+                .where(
+                    IngestionJob.state == "queued",
+                    IngestionJob.created_at < now - timedelta(seconds=self.lease_seconds),
+                )
+                .order_by(IngestionJob.created_at)
+            )
+            stale_ids = stale.scalars().all()
+
+        for job_id in job_ids:
+            logger.warning("Ingestion job %s lost its worker, queued again", job_id)
+            self._enqueue(job_id)
+        for job_id in stale_ids:
+            self._enqueue(job_id)
+
+    async def _recover_forever(self) -> None:
+        while True:
+            try:
+                await self._recover()
+            except Exception:
+                logger.exception("Recovering ingestion jobs failed")
+            await asyncio.sleep(self.lease_seconds)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, db: AsyncSession, kind: str, table_name: str, filename: str, content: bytes,
+                     options: Optional[dict] = None) -> IngestionJob:
+        job_id = uuid.uuid4().hex
+        payload_path = os.path.join(self.spool_dir, job_id)
+        await asyncio.to_thread(_write_payload, payload_path, content)
+
+        job = IngestionJob(
+            id=job_id,
+            kind=kind,
+            table_name=table_name,
+            filename=filename,
+            payload_path=payload_path,
+            state="queued",
+            rows_processed=0,
+            options=options,
+            created_at=datetime.utcnow(),
+        )
+        db.add(job)
+        await db.commit()
+
+        self._enqueue(job_id)
+        return job
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Ingestion job %s crashed", job_id)
+            finally:
+                self._pending.discard(job_id)
+                self._queue.task_done()
+
+    async def _update(self, job_id: str, **values) -> bool:
+        # Only while this worker holds the job: after a lost lease another worker owns it.
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id, IngestionJob.owner == self.owner)
+                .values(**values)
+            )
+            await session.commit()
+        return result.rowcount > 0
+
+    async def _claim(self, job_id: str, started_at: datetime) -> bool:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id, IngestionJob.state == "queued")
+                .values(state="running", started_at=started_at, rows_processed=0, errors=None,
+                        owner=self.owner, lease_expires_at=self._lease_end())
+                .returning(IngestionJob.id)
+            )
+            claimed = result.scalar_one_or_none() is not None
+            await session.commit()
+        return claimed
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self._update(job_id, lease_expires_at=self._lease_end())
+            except Exception:
+                logger.exception("Renewing the lease of ingestion job %s failed", job_id)
+                continue
+            if not renewed:
+                logger.warning("Ingestion job %s was taken over by another worker", job_id)
+                return
+
+    async def _run(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as session:
+            job = await session.get(IngestionJob, job_id)
+        if job is None or job.state != "queued":
+            return
+
+        async with self._table_limits[job.table_name]:
+            started_at = datetime.utcnow()
+            if not await self._claim(job_id, started_at):
+                return
+
+            async def progress(processed: int, total: int) -> None:
+                elapsed = (datetime.utcnow() - started_at).total_seconds()
+                await self._update(
+                    job_id,
+                    rows_processed=processed,
+                    rows_total=total,
+                    rows_per_second=round(processed / elapsed, 2) if elapsed else None,
+                )
+
+            heartbeat = asyncio.create_task(self._heartbeat(job_id))
+            try:
+                content = await asyncio.to_thread(_read_payload, job.payload_path)
+                async with AsyncSessionLocal() as session:
+                    if job.kind == PLANS_WORKBOOK_JOB:
+                        result = await ingest_plans(session, content, progress)
+                    elif job.kind == ARCHIVE_JOB:
+                        result = await ingest_archive(session, content, progress, **(job.options or {}))
+                    else:
+                        result = await ingest_table(
+                            session, job.table_name, content, progress, JOB_FORMATS[job.kind], **(job.options or {})
+                        )
+            except HTTPException as e:
+                errors = e.detail if isinstance(e.detail, list) else [e.detail]
+                finished = {"state": "failed", "errors": errors}
+            except Exception as e:
+                logger.exception("Ingestion job %s failed", job_id)
+                finished = {"state": "failed", "errors": [str(e)]}
+            else:
+                finished = {"state": "succeeded", "result": result}
+            finally:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+
+            if not await self._update(job_id, finished_at=datetime.utcnow(), lease_expires_at=None, **finished):
+                # The job was queued again and belongs to another worker now, payload included.
+                return
+
+        await asyncio.to_thread(_remove_payload, job.payload_path)
+
+
+def _write_payload(path: str, content: bytes) -> None:
+    with open(path, "wb") as payload:
+        payload.write(content)
+
+
+def _read_payload(path: str) -> bytes:
+    with open(path, "rb") as payload:
+        return payload.read()
+
+
+def _remove_payload(path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+
+
+job_runner = JobRunner(
+    settings.JOB_WORKERS, settings.JOB_TABLE_CONCURRENCY, settings.JOB_SPOOL_DIR, settings.JOB_LEASE_SECONDS
+)
@@ -0,0 +1,143 @@
+import io
+import os
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from app.models import User, Credit, Dictionary, Plan, Payment
+from app.schemas.model_schemas import UserCSV, CreditCSV, DictionaryCSV, PlanCSV, PaymentCSV
+from app.services.csv_validation import csv_dtypes, validate_arrow_table, validate_frame
+
+MODEL_MAPPING = {
+    "users": User,
+    "credits": Credit,
+    "dictionary": Dictionary,
+    "plans": Plan,
+    "payments": Payment
+}
+
+SCHEMA_MAPPING = {
+    "users": UserCSV,
+    "credits": CreditCSV,
+    "dictionary": DictionaryCSV,
+    "plans": PlanCSV,
+    "payments": PaymentCSV
+}
+
+
+FORMAT_EXTENSIONS = {
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+
+class CSVReadError(Exception):
+    pass
+
+
+def detect_format(filename: Optional[str], content: bytes) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in FORMAT_EXTENSIONS:
+        return FORMAT_EXTENSIONS[extension]
+    if content[:4] == b"PAR1":
+        return "parquet"
+    if content[:6] == b"ARROW1" or content[:4] == b"\xff\xff\xff\xff":
+        return "arrow"
+    return "tsv"
+
+
+def _read_arrow_table(content: bytes, file_format: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if file_format == "parquet":
+        return pq.read_table(pa.BufferReader(content))
+    # Arrow IPC comes either as a file (Feather v2) or as a stream.
+    try:
+        return pa.ipc.open_file(pa.BufferReader(content)).read_all()
+    except pa.ArrowInvalid:
+        return pa.ipc.open_stream(pa.BufferReader(content)).read_all()
+
+
+def parse_table(
+    table_name: str,
+    content: bytes,
+    file_format: str = "tsv",
+) -> Tuple[List[str], List[Tuple[Any, ...]], List[str]]:
+    model = MODEL_MAPPING[table_name]
+    columns = [column.name for column in model.__table__.columns]
+
+    # pandas, pyarrow and openpyxl are imported on first use, so API workers that never parse
+    # an upload start without them.
+    if file_format in ("parquet", "arrow"):
+        try:
+            table = _read_arrow_table(content, file_format)
+        except Exception as e:
+            raise CSVReadError(f"Error reading {file_format.capitalize()}: {e}")
+        rows, errors = validate_arrow_table(table, SCHEMA_MAPPING[table_name], columns)
+        return columns, rows, errors
+
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(io.BytesIO(content), sep='\t', encoding='utf-8', dtype=csv_dtypes(SCHEMA_MAPPING[table_name]))
+    except Exception as e:
+        raise CSVReadError(f"Error reading CSV: {e}")
+
+    rows, errors = validate_frame(df, SCHEMA_MAPPING[table_name], columns)
+    return columns, rows, errors
+
+
+def parse_plan_workbook(content: bytes) -> Tuple[List[Tuple[int, date, str, Decimal]], List[str]]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filename=io.BytesIO(content), read_only=True, data_only=True)
+    sheet = workbook.active
+
+    errors = []
+    parsed_rows = []
+
+    try:
+        for idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+            if not row or all(cell is None for cell in row):
+                continue
+
+            if len(row) < 3:
+                errors.append(f"Row {idx}: incomplete row")
+                continue
+
+            raw_date, raw_category, raw_sum = row[:3]
+
+            try:
+                if isinstance(raw_date, datetime):
+                    parsed_date = raw_date.date()
+                elif isinstance(raw_date, date):
+                    parsed_date = raw_date
+                else:
+                    parsed_date = datetime.strptime(str(raw_date), "%Y-%m-%d").date()
+            except Exception:
+                errors.append(f"Row {idx}: invalid date format")
+                continue
+
+            if parsed_date.day != 1:
+                errors.append(f"Row {idx}: date must be the first day of the month")
+                continue
+
+            if raw_sum is None:
+                errors.append(f"Row {idx}: sum cannot be null")
+                continue
+
+            try:
+                amount = Decimal(str(raw_sum))
+            except Exception:
+                errors.append(f"Row {idx}: invalid sum value")
+                continue
+
+            parsed_rows.append((idx, parsed_date, str(raw_category).strip(), amount))
+    finally:
+        workbook.close()
+
+    return parsed_rows, errors
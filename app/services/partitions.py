@@ -0,0 +1,160 @@
+import asyncio
+import re
+from datetime import date
+from typing import Any, List, Optional, Sequence, Set, Tuple, Union
+
+from sqlalchemy import Subquery, Table, column, select, table as table_clause, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+# Tables range-partitioned by month, with the column they are partitioned on.
+PARTITION_KEYS = {
+    "credits": "issuance_date",
+    "payments": "payment_date",
+}
+
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_y(?P<year>\d{4})m(?P<month>\d{2})$")
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: date) -> str:
+    return f"{table_name}_y{month.year}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match["year"]), int(match["month"]), 1)
+
+
+async def existing_partitions(db: AsyncSession, table_name: str) -> Set[str]:
+    result = await db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table_name)"
+    ), {"table_name": table_name})
+    return set(result.scalars())
+
+
+async def archived_partitions(db: AsyncSession, table_name: str) -> List[str]:
+    """Monthly partitions of ``table_name`` that ``archive_partitions`` moved to the archive schema."""
+    result = await db.execute(text(
+        "SELECT class.relname FROM pg_class class "
+        "JOIN pg_namespace namespace ON namespace.oid = class.relnamespace "
+        "WHERE namespace.nspname = :schema AND class.relkind = 'r'"
+    ), {"schema": settings.PARTITION_ARCHIVE_SCHEMA})
+    return sorted(
+        name for name in result.scalars()
+        if _PARTITION_NAME.match(name) and _PARTITION_NAME.match(name)["table"] == table_name
+    )
+
+
+async def with_archived(db: AsyncSession, table: Table, columns: Sequence[str]) -> Union[Table, Subquery]:
+    """``table`` together with its archived partitions, as a selectable with at least ``columns``.
+
+    Archived months are detached from the parent table, but what was derived from them (balances,
+    the rollup) keeps them, so rebuilding it has to read them too.
+    """
+    archived = await archived_partitions(db, table.name)
+    if not archived:
+        return table
+    return union_all(
+        select(*(table.c[name] for name in columns)),
+        *(
+            select(*(column(name) for name in columns)).select_from(
+                table_clause(partition, schema=settings.PARTITION_ARCHIVE_SCHEMA)
+            )
+            for partition in archived
+        ),
+    ).subquery(table.name)
+
+
+async def ensure_partitions(db: AsyncSession, table_name: str, first: date, last: date) -> List[str]:
+    conn = await db.connection()
+    if conn.dialect.name != "postgresql" or table_name not in PARTITION_KEYS:
+        return []
+
+    start = month_start(first)
+    end = add_months(month_start(last), settings.PARTITION_PREMAKE_MONTHS)
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    if months > settings.PARTITION_MAX_SPAN_MONTHS:
+        raise ValueError(
+            f"{table_name} rows span {first} to {last}, which needs {months} monthly partitions "
+            f"(PARTITION_MAX_SPAN_MONTHS is {settings.PARTITION_MAX_SPAN_MONTHS})"
+        )
+
+    # Serialises concurrent loads into the same table; released with the transaction.
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"partitions:{table_name}"})
+    existing = await existing_partitions(db, table_name)
+
+    created = []
+    month = start
+    while month <= end:
+        name = partition_name(table_name, month)
+        if name not in existing:
+            await db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+
+    return created
+
+
+def _date_range(rows: List[Tuple[Any, ...]], index: int) -> Tuple[date, date]:
+    values = [row[index] for row in rows]
+    return min(values), max(values)
+
+
+async def ensure_partitions_for_rows(
+    db: AsyncSession,
+    table_name: str,
+    columns: Sequence[str],
+    rows: List[Tuple[Any, ...]],
+) -> List[str]:
+    key = PARTITION_KEYS.get(table_name)
+    if key is None or not rows:
+        return []
+
+    first, last = await asyncio.to_thread(_date_range, rows, list(columns).index(key))
+    return await ensure_partitions(db, table_name, first, last)
+
+
+async def archive_partitions(db: AsyncSession, table_name: str, before: date) -> Tuple[List[str], List[str]]:
+    """Detach every monthly partition that ends on or before ``before`` and move it to the archive schema.
+
+    Archived months drop out of queries on the parent table but keep their data, so they can be
+    dumped and dropped, or attached back with ``ALTER TABLE ... ATTACH PARTITION``. A month of
+    credits that still holds an open credit is kept, since open credits have to stay in the user's
+    credits, the overdue buckets and the export. Returns the archived and the kept partitions.
+    """
+    cutoff = month_start(before)
+    schema = settings.PARTITION_ARCHIVE_SCHEMA
+
+    archived, kept = [], []
+    for name in sorted(await existing_partitions(db, table_name)):
+        month = partition_month(name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        if table_name == "credits" and await db.scalar(text(
+            f"SELECT EXISTS (SELECT 1 FROM {name} WHERE actual_return_date IS NULL)"
+        )):
+            kept.append(name)
+            continue
+        await db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        await db.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+        await db.execute(text(f"ALTER TABLE {name} SET SCHEMA {schema}"))
+        archived.append(name)
+
+    return archived, kept
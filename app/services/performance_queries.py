@@ -0,0 +1,211 @@
+from datetime import date
+from typing import Optional, Tuple
+
+from sqlalchemy import Select, case, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import INTERVAL
+from sqlalchemy.types import Date
+
+from app.models import PerformanceRollup, Plan
+
+
+def year_bounds(year: int) -> Tuple[date, date]:
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def _month(column):
+    return func.date_trunc("month", column)
+
+
+def month_performance_query(target_date: date) -> Select:
+    start_of_month = date(target_date.year, target_date.month, 1)
+
+    actual_subquery = (
+        select(
+            PerformanceRollup.category_id,
+            func.sum(PerformanceRollup.collected_sum).label("actual_sum_payment"),
+            func.sum(PerformanceRollup.issued_body).label("actual_sum_credit"),
+        )
+        .where(
+            PerformanceRollup.day >= start_of_month,
+            PerformanceRollup.day <= target_date,
+        )
+        .group_by(PerformanceRollup.category_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Plan.period,
+            Plan.category_id,
+            Plan.sum.label("plan_sum"),
+            actual_subquery.c.actual_sum_payment,
+            actual_subquery.c.actual_sum_credit,
+        )
+        .outerjoin(actual_subquery, actual_subquery.c.category_id == Plan.category_id)
+        .where(
+            Plan.period >= start_of_month,
+            Plan.period <= target_date,
+        )
+        .order_by(Plan.period)
+    )
+
+
+def year_performance_query(
+    year: int,
+    issuance_category_id: Optional[int],
+    collection_category_id: Optional[int],
+) -> Select:
+    start, end = year_bounds(year)
+
+    plan_month = _month(Plan.period)
+    plans_by_month = (
+        select(
+            plan_month.label("month"),
+            func.sum(
+                case((Plan.category_id == issuance_category_id, Plan.sum), else_=0)
+            ).label("plan_credit_sum"),
+            func.sum(
+                case((Plan.category_id == collection_category_id, Plan.sum), else_=0)
+            ).label("plan_payment_sum"),
+        )
+        .where(Plan.period >= start, Plan.period < end)
+        .group_by(plan_month)
+        .cte("plans_by_month")
+    )
+
+    rollup_month = _month(PerformanceRollup.day)
+    credits_by_month = (
+        select(
+            rollup_month.label("month"),
+            func.sum(PerformanceRollup.issued_count).label("credit_count"),
+            func.sum(PerformanceRollup.issued_body).label("actual_credit_sum"),
+        )
+        .where(
+            PerformanceRollup.day >= start,
+            PerformanceRollup.day < end,
+            PerformanceRollup.issued_count > 0,
+        )
+        .group_by(rollup_month)
+        .cte("credits_by_month")
+    )
+
+    payments_by_month = (
+        select(
+            rollup_month.label("month"),
+            func.sum(PerformanceRollup.collected_count).label("payment_count"),
+            func.sum(PerformanceRollup.collected_sum).label("actual_payment_sum"),
+        )
+        .where(
+            PerformanceRollup.day >= start,
+            PerformanceRollup.day < end,
+            PerformanceRollup.collected_count > 0,
+        )
+        .group_by(rollup_month)
+        .cte("payments_by_month")
+    )
+
+    return (
+        select(
+            plans_by_month.c.month,
+            func.coalesce(credits_by_month.c.credit_count, 0).label("credit_count"),
+            plans_by_month.c.plan_credit_sum,
+            credits_by_month.c.actual_credit_sum,
+            func.coalesce(payments_by_month.c.payment_count, 0).label("payment_count"),
+            plans_by_month.c.plan_payment_sum,
+            payments_by_month.c.actual_payment_sum,
+        )
+        .select_from(plans_by_month)
+        .outerjoin(credits_by_month, credits_by_month.c.month == plans_by_month.c.month)
+        .outerjoin(payments_by_month, payments_by_month.c.month == plans_by_month.c.month)
+        .order_by(plans_by_month.c.month)
+    )
+
+
+def _percent(part, whole):
+    return func.coalesce(func.round(part * 100 / func.nullif(whole, 0), 2), 0)
+
+
+def performance_range_query(
+    start: date,
+    end: date,
+    granularity: str,
+    issuance_category_id: Optional[int],
+    collection_category_id: Optional[int],
+) -> Select:
+    def bucket_of(column):
+        return cast(func.date_trunc(granularity, column), Date)
+
+    series = select(
+        cast(
+            func.generate_series(
+                func.date_trunc(granularity, literal(start, Date)),
+                literal(end, Date),
+                cast(literal(f"1 {granularity}"), INTERVAL),
+            ),
+            Date,
+        ).label("bucket")
+    ).cte("series")
+
+    # Plans are monthly; spreading each one evenly over its days lets weeks and partial
+    # months at the edges of the range get their share of it.
+    days = select(
+        cast(func.generate_series(literal(start, Date), literal(end, Date), cast(literal("1 day"), INTERVAL)), Date).label("day")
+    ).cte("days")
+    days_in_month = func.extract(
+        "day", func.date_trunc("month", days.c.day) + cast(literal("1 month - 1 day"), INTERVAL)
+    )
+    day_bucket = bucket_of(days.c.day)
+    plans_by_bucket = (
+        select(
+            day_bucket.label("bucket"),
+            func.sum(
+                case((Plan.category_id == issuance_category_id, Plan.sum / days_in_month), else_=0)
+            ).label("plan_credit_sum"),
+            func.sum(
+                case((Plan.category_id == collection_category_id, Plan.sum / days_in_month), else_=0)
+            ).label("plan_payment_sum"),
+        )
+        .select_from(days)
+        .join(Plan, Plan.period == cast(func.date_trunc("month", days.c.day), Date))
+        .group_by(day_bucket)
+        .cte("plans_by_bucket")
+    )
+
+    rollup_bucket = bucket_of(PerformanceRollup.day)
+    actuals_by_bucket = (
+        select(
+            rollup_bucket.label("bucket"),
+            func.sum(PerformanceRollup.issued_count).label("credit_count"),
+            func.sum(PerformanceRollup.issued_body).label("actual_credit_sum"),
+            func.sum(PerformanceRollup.collected_count).label("payment_count"),
+            func.sum(PerformanceRollup.collected_sum).label("actual_payment_sum"),
+        )
+        .where(PerformanceRollup.day >= start, PerformanceRollup.day <= end)
+        .group_by(rollup_bucket)
+        .cte("actuals_by_bucket")
+    )
+
+    plan_credit = func.round(func.coalesce(plans_by_bucket.c.plan_credit_sum, 0), 2)
+    plan_payment = func.round(func.coalesce(plans_by_bucket.c.plan_payment_sum, 0), 2)
+    actual_credit = func.coalesce(actuals_by_bucket.c.actual_credit_sum, 0)
+    actual_payment = func.coalesce(actuals_by_bucket.c.actual_payment_sum, 0)
+
+    return (
+        select(
+            series.c.bucket.label("period"),
+            func.coalesce(actuals_by_bucket.c.credit_count, 0).label("credit_count"),
+            plan_credit.label("plan_credit_sum"),
+            actual_credit.label("actual_credit_sum"),
+            _percent(actual_credit, plan_credit).label("credit_performance_percent"),
+            func.coalesce(actuals_by_bucket.c.payment_count, 0).label("payment_count"),
+            plan_payment.label("plan_payment_sum"),
+            actual_payment.label("actual_payment_sum"),
+            _percent(actual_payment, plan_payment).label("payment_performance_percent"),
+            _percent(actual_credit, func.sum(actual_credit).over()).label("credit_share_percent"),
+            _percent(actual_payment, func.sum(actual_payment).over()).label("payment_share_percent"),
+        )
+        .select_from(series)
+        .outerjoin(plans_by_bucket, plans_by_bucket.c.bucket == series.c.bucket)
+        .outerjoin(actuals_by_bucket, actuals_by_bucket.c.bucket == series.c.bucket)
+        .order_by(series.c.bucket)
+    )
@@ -0,0 +1,190 @@
+import asyncio
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Credit, Payment, PerformanceRollup
+from app.services.dictionary_cache import COLLECTION_CATEGORY, ISSUANCE_CATEGORY, dictionary_cache
+from app.services.partitions import with_archived
+
+UPSERT_BATCH_SIZE = 1_000
+CENT = Decimal("0.01")
+
+
+async def _upsert(db: AsyncSession, values: List[Dict[str, Any]]) -> None:
+    table = PerformanceRollup.__table__
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(table).values(values[start:start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.category_id],
+            set_={
+                column: table.c[column] + stmt.excluded[column]
+                for column in ("issued_count", "issued_body", "collected_count", "collected_sum")
+            },
+        )
+        await db.execute(stmt)
+
+
+def _aggregate(rows: List[Tuple[Any, ...]], day_index: int, amount_index: int,
+               places: Optional[Decimal] = None) -> Dict[Any, List]:
+    # With ``places``, every amount is rounded the way its NUMERIC column stores it before it is added.
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for row in rows:
+        bucket = totals[row[day_index]]
+        bucket[0] += 1
+        amount = Decimal(str(row[amount_index]))
+        bucket[1] += amount.quantize(places, ROUND_HALF_UP) if places is not None else amount
+    return totals
+
+
+async def apply_upload(
+    db: AsyncSession,
+    table_name: str,
+    columns: Sequence[str],
+    rows: List[Tuple[Any, ...]],
+) -> None:
+    if table_name == "dictionary":
+        await dictionary_cache.load(db)
+        await rebuild_rollup(db)
+        return
+
+    if table_name not in ("credits", "payments"):
+        return
+
+    dictionary = await dictionary_cache.ensure_loaded(db)
+
+    if table_name == "credits":
+        category_id = dictionary.id_of(ISSUANCE_CATEGORY)
+        totals = await asyncio.to_thread(_aggregate, rows, columns.index("issuance_date"), columns.index("body"))
+        values = [
+            {"day": day, "category_id": category_id, "issued_count": count, "issued_body": amount,
+             "collected_count": 0, "collected_sum": 0}
+            for day, (count, amount) in totals.items()
+        ]
+    else:
+        category_id = dictionary.id_of(COLLECTION_CATEGORY)
+        # credits.body is a float and is summed as is; payments.sum is NUMERIC(12,2).
+        totals = await asyncio.to_thread(
+            _aggregate, rows, columns.index("payment_date"), columns.index("sum"), CENT
+        )
+        values = [
+            {"day": day, "category_id": category_id, "issued_count": 0, "issued_body": 0,
+             "collected_count": count, "collected_sum": amount}
+            for day, (count, amount) in totals.items()
+        ]
+
+    # Without the category in the dictionary there is nothing to attach the totals to yet;
+    # the dictionary upload rebuilds the rollup from the fact tables.
+    if category_id is None:
+        return
+
+    await _upsert(db, values)
+
+
+async def _credits(db: AsyncSession):
+    # Archived months stay in the rollup, so it is recomputed from them too.
+    return await with_archived(db, Credit.__table__, ["issuance_date", "body"])
+
+
+async def _payments(db: AsyncSession):
+    return await with_archived(db, Payment.__table__, ["payment_date", "sum"])
+
+
+async def refresh_days(db: AsyncSession, table_name: str, days: Iterable[date]) -> None:
+    # Recomputed from the fact table rather than added to, which stays right when a chunked load
+    # updates rows that were loaded before.
+    days = sorted(set(days))
+    if table_name not in ("credits", "payments") or not days:
+        return
+
+    dictionary = await dictionary_cache.ensure_loaded(db)
+    if table_name == "credits":
+        category_id = dictionary.id_of(ISSUANCE_CATEGORY)
+        credits = (await _credits(db)).c
+        source = select(
+            credits.issuance_date.label("day"),
+            literal(category_id).label("category_id"),
+            func.count().label("issued_count"),
+            func.sum(credits.body).label("issued_body"),
+            literal(0).label("collected_count"),
+            literal(0).label("collected_sum"),
+        ).where(credits.issuance_date.in_(days)).group_by(credits.issuance_date)
+        refreshed = ("issued_count", "issued_body")
+    else:
+        category_id = dictionary.id_of(COLLECTION_CATEGORY)
+        payments = (await _payments(db)).c
+        source = select(
+            payments.payment_date.label("day"),
+            literal(category_id).label("category_id"),
+            literal(0).label("issued_count"),
+            literal(0).label("issued_body"),
+            func.count().label("collected_count"),
+            func.sum(payments.sum).label("collected_sum"),
+        ).where(payments.payment_date.in_(days)).group_by(payments.payment_date)
+        refreshed = ("collected_count", "collected_sum")
+
+    if category_id is None:
+        return
+
+    table = PerformanceRollup.__table__
+    # A day whose rows all moved to another day is missing from the source and drops to zero.
+    await db.execute(
+        update(table)
+        .where(table.c.day.in_(days), table.c.category_id == category_id)
+        .values({column: 0 for column in refreshed})
+    )
+    columns = ["day", "category_id", "issued_count", "issued_body", "collected_count", "collected_sum"]
+    stmt = pg_insert(table).from_select(columns, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.category_id],
+        set_={column: stmt.excluded[column] for column in refreshed},
+    )
+    await db.execute(stmt)
+
+
+async def rebuild_rollup(db: AsyncSession) -> int:
+    dictionary = await dictionary_cache.ensure_loaded(db)
+    issuance_id = dictionary.id_of(ISSUANCE_CATEGORY)
+    collection_id = dictionary.id_of(COLLECTION_CATEGORY)
+    await db.execute(delete(PerformanceRollup))
+
+    sources = []
+    if issuance_id is not None:
+        credits = (await _credits(db)).c
+        sources.append(
+            select(
+                credits.issuance_date.label("day"),
+                literal(issuance_id).label("category_id"),
+                func.count().label("issued_count"),
+                func.sum(credits.body).label("issued_body"),
+                literal(0).label("collected_count"),
+                literal(0).label("collected_sum"),
+            ).group_by(credits.issuance_date)
+        )
+    if collection_id is not None:
+        payments = (await _payments(db)).c
+        sources.append(
+            select(
+                payments.payment_date.label("day"),
+                literal(collection_id).label("category_id"),
+                literal(0).label("issued_count"),
+                literal(0).label("issued_body"),
+                func.count().label("collected_count"),
+                func.sum(payments.sum).label("collected_sum"),
+            ).group_by(payments.payment_date)
+        )
+
+    if not sources:
+        return 0
+
+    columns = ["day", "category_id", "issued_count", "issued_body", "collected_count", "collected_sum"]
+    source = sources[0] if len(sources) == 1 else union_all(*sources)
+    result = await db.execute(
+        PerformanceRollup.__table__.insert().from_select(columns, source)
+    )
+    return result.rowcount
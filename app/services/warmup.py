@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from datetime import date
+from typing import List
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.core.database import engine, read_router
+from app.services.credit_queries import overdue_buckets_query, user_credits_query
+from app.services.dictionary_cache import BODY_PAYMENT, COLLECTION_CATEGORY, ISSUANCE_CATEGORY, DictionaryCache
+from app.services.performance_queries import month_performance_query, year_performance_query
+
+logger = logging.getLogger(__name__)
+
+# Far outside any real data, so every warm-up query is an index probe that finds nothing.
+WARMUP_DATE = date(1900, 1, 1)
+
+
+def hot_statements(dictionary: DictionaryCache) -> List[Select]:
+    # Same builders and the same kinds of parameters as the routes, so the compiled SQL matches theirs.
+    return [
+        user_credits_query(0, WARMUP_DATE),
+        month_performance_query(WARMUP_DATE),
+        year_performance_query(
+            WARMUP_DATE.year, dictionary.id_of(ISSUANCE_CATEGORY), dictionary.id_of(COLLECTION_CATEGORY)
+        ),
+        # The route's default, today's book, reads the balance ledger.
+        overdue_buckets_query(WARMUP_DATE, dictionary.id_of(BODY_PAYMENT), from_ledger=True),
+    ]
+
+
+async def _warm_connection(conn: AsyncConnection, statements: List[Select], ready: asyncio.Barrier) -> None:
+    for stmt in statements:
+        # Fills SQLAlchemy's compiled cache and asyncpg's per-connection prepared statement cache.
+        await conn.execute(stmt)
+    await conn.rollback()
+    # Hold on until every connection is open, or the pool would hand the same one out again.
+    await ready.wait()
+
+
+async def _warm_engine(warm_engine: AsyncEngine, connections: int, statements: List[Select]) -> None:
+    connections = min(connections, warm_engine.pool.size())
+    ready = asyncio.Barrier(connections)
+
+    async def warm_one() -> None:
+        try:
+            async with warm_engine.connect() as conn:
+                await _warm_connection(conn, statements, ready)
+        except BaseException:
+            await ready.abort()
+            raise
+
+    await asyncio.gather(*(warm_one() for _ in range(connections)))
+
+
+async def warm_up(dictionary: DictionaryCache) -> None:
+    """Open ``STARTUP_WARM_CONNECTIONS`` connections per pool and prepare the read-path statements on them.
+
+    A replica that cannot be reached is logged and skipped; the read router deals with it per request.
+    """
+    connections = settings.STARTUP_WARM_CONNECTIONS
+    if connections <= 0:
+        return
+
+    statements = hot_statements(dictionary)
+    read_engines = [*read_router.replicas, read_router.fallback]
+    targets = [(engine, statements if engine in read_engines else [])]
+    targets += [(read_engine, statements) for read_engine in read_engines if read_engine is not engine]
+
+    results = await asyncio.gather(
+        *(_warm_engine(target, connections, target_statements) for target, target_statements in targets),
+        return_exceptions=True,
+    )
+    for (target, _), result in zip(targets, results):
+        if isinstance(result, BaseException):
+            if target is engine:
+                raise result
+            logger.warning("Could not warm up the pool for %r: %s", target.url, result)
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from app.core import query_budget
+from app.core.query_budget import QueryStats, track_queries
+
+
+class QueryCapture:
+    def __init__(self, direct: QueryStats):
+        self.direct = direct
+        self.requests: List[Tuple[str, QueryStats]] = []
+
+    def __call__(self, route: str, stats: QueryStats) -> None:
+        self.requests.append((route, stats))
+
+    @property
+    def counts(self) -> List[int]:
+        return [stats.count for _, stats in self.requests] or [self.direct.count]
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryCapture]:
+    """Collect statement counts for code run in the block and for each request served during it."""
+    with track_queries(fresh=True) as direct:
+        capture = QueryCapture(direct)
+        query_budget.observers.append(capture)
+        try:
+            yield capture
+        finally:
+            query_budget.observers.remove(capture)
+
+
+@contextmanager
+def assert_max_queries(limit: int, max_repeats: Optional[int] = None) -> Iterator[QueryCapture]:
+    """Fail if the block, or any request served inside it, runs more than ``limit`` statements.
+
+    ``max_repeats`` additionally caps how often one statement shape may run, which is how an
+    N+1 loop shows up::
+
+        with assert_max_queries(2):
+            client.get("/credits/user_credits/1")
+    """
+    with capture_queries() as capture:
+        yield capture
+
+    for route, stats in capture.requests or [("<block>", capture.direct)]:
+        assert stats.count <= limit, f"{route} ran {stats.count} queries, expected at most {limit}: {dict(stats.shapes)}"
+        if max_repeats is not None:
+            repeated = stats.repeated(max_repeats + 1)
+            assert not repeated, f"{route} repeated statements more than {max_repeats} times: {repeated}"
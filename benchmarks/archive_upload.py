@@ -0,0 +1,142 @@
+"""Load the generator's five TSV files one by one and as one archive, and compare.
+
+Packs the files from ``benchmarks.generator`` into a zip and a tar.gz, then
+runs against an empty database each time:
+
+* ``sequential``: five ``ingest_table`` calls in dependency order, like five
+  ``/upload/upload_csv`` requests;
+* ``archive``: ``ingest_archive`` on the zip, tables of a level loaded
+  concurrently on separate sessions;
+* ``atomic``: ``ingest_archive(atomic=True)`` on the tar.gz, one transaction.
+
+and checks that every run leaves the same row counts. A last run puts a bad
+row into ``users`` to show the per-table report (``credits`` and ``payments``
+are skipped) and the atomic rollback (nothing is loaded).
+
+Usage:
+    python -m benchmarks.generator --payments 1000000 --out bench_data
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.archive_upload --data bench_data
+"""
+import argparse
+import asyncio
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+BENCH_DATABASE_URL = os.environ.setdefault("BENCH_DATABASE_URL", os.getenv("DATABASE_URL", ""))
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy import func, select, text  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, dispose_engines  # noqa: E402
+from app.core.executor import shutdown_executor  # noqa: E402
+from app.services.archive import ingest_archive, load_order  # noqa: E402
+from app.services.ingestion import ingest_table  # noqa: E402
+from app.services.parsers import MODEL_MAPPING  # noqa: E402
+
+TABLES = list(MODEL_MAPPING)
+
+
+def read_files(data_dir: str) -> dict:
+    files = {}
+    for table_name in TABLES:
+        with open(os.path.join(data_dir, f"{table_name}.tsv"), "rb") as f:
+            files[f"{table_name}.tsv"] = f.read()
+    return files
+
+
+def pack_zip(files: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for filename, content in files.items():
+            archive.writestr(f"feed/{filename}", content)
+    return buffer.getvalue()
+
+
+def pack_tar(files: dict) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for filename, content in files.items():
+            info = tarfile.TarInfo(filename)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+async def truncate() -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(
+            "TRUNCATE performance_rollup, credit_balances, credit_ids, payment_ids, ingestion_checkpoints, "
+            f"{', '.join(TABLES)} CASCADE"
+        ))
+        await db.commit()
+
+
+async def row_counts() -> dict:
+    async with AsyncSessionLocal() as db:
+        return {
+            table_name: await db.scalar(select(func.count()).select_from(model))
+            for table_name, model in MODEL_MAPPING.items()
+        }
+
+
+async def run_sequential(files: dict) -> None:
+    for level in load_order(set(TABLES)):
+        for table_name in level:
+            async with AsyncSessionLocal() as db:
+                await ingest_table(db, table_name, files[f"{table_name}.tsv"])
+
+
+async def run_archive(content: bytes, atomic: bool) -> dict:
+    async with AsyncSessionLocal() as db:
+        return await ingest_archive(db, content, atomic=atomic)
+
+
+async def timed(name: str, run) -> dict:
+    await truncate()
+    started = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - started
+    counts = await row_counts()
+    print(f"{name:<11} time={elapsed:7.2f}s rows={counts}")
+    return counts
+
+
+async def main(data_dir: str):
+    if not BENCH_DATABASE_URL:
+        raise SystemExit("BENCH_DATABASE_URL must be set")
+
+    files = read_files(data_dir)
+    zipped, tarred = pack_zip(files), pack_tar(files)
+    print(f"order: {load_order(set(TABLES))}  zip={len(zipped) / 1024 / 1024:.1f}MB "
+          f"tar.gz={len(tarred) / 1024 / 1024:.1f}MB")
+
+    expected = await timed("sequential", lambda: run_sequential(files))
+    for name, run in [("archive", lambda: run_archive(zipped, False)), ("atomic", lambda: run_archive(tarred, True))]:
+        if await timed(name, run) != expected:
+            raise SystemExit(f"{name} loaded different row counts")
+
+    broken = dict(files)
+    broken["users.tsv"] += b"not a user row\n"
+    await truncate()
+    report = await run_archive(pack_zip(broken), False)
+    print("bad users, per table:", {name: result["status"] for name, result in report["tables"].items()})
+    await truncate()
+    try:
+        await run_archive(pack_tar(broken), True)
+    except HTTPException as e:
+        print(f"bad users, atomic: {e.status_code} {str(e.detail)[:120]}")
+    print("rows after the atomic failure:", await row_counts())
+
+    shutdown_executor()
+    await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="bench_data")
+    args = parser.parse_args()
+    asyncio.run(main(args.data))
@@ -0,0 +1,104 @@
+"""Compare the ORM ``add_all`` path with ``bulk_insert`` for payments.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.bulk_load --sizes 10000 1000000 10000000
+
+The target database must be a disposable one with the schema applied
+(``alembic upgrade head``): the ``payments`` table is truncated between runs.
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+BENCH_DATABASE_URL = os.environ.setdefault("BENCH_DATABASE_URL", os.getenv("DATABASE_URL", ""))
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from app.models import Payment  # noqa: E402
+from app.services.bulk_insert import bulk_insert  # noqa: E402
+from app.services.partitions import ensure_partitions  # noqa: E402
+
+PAYMENT_COLUMNS = [column.name for column in Payment.__table__.columns]
+
+
+def make_rows(count: int):
+    start = date(2024, 1, 1)
+    return [
+        (i, Decimal(f"{(i % 5000) + 1}.50"), start + timedelta(days=i % 365), 1, 1)
+        for i in range(1, count + 1)
+    ]
+
+
+async def seed(engine):
+    async with AsyncSession(engine) as db:
+        await ensure_partitions(db, "credits", date(2024, 1, 1), date(2024, 1, 1))
+        await ensure_partitions(db, "payments", date(2024, 1, 1), date(2024, 12, 31))
+        await db.commit()
+
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE payments, payment_ids, credit_ids, credits, users, plans, dictionary CASCADE"))
+        await conn.execute(text("INSERT INTO dictionary (id, name) VALUES (1, 'тіло')"))
+        await conn.execute(text(
+            "INSERT INTO users (id, login, registration_date) VALUES (1, 'bench', '2024-01-01')"
+        ))
+        await conn.execute(text(
+            "INSERT INTO credits (id, user_id, issuance_date, return_date, body, percent) "
+            "VALUES (1, 1, '2024-01-01', '2025-01-01', 1000, 100)"
+        ))
+
+
+async def truncate_payments(engine):
+    async with engine.begin() as conn:
+        await conn.execute(text("TRUNCATE payments, payment_ids"))
+
+
+async def run_orm(engine, rows) -> float:
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        started = time.perf_counter()
+        db.add_all(Payment(**dict(zip(PAYMENT_COLUMNS, row))) for row in rows)
+        await db.commit()
+        return time.perf_counter() - started
+
+
+async def run_bulk(engine, rows) -> float:
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        started = time.perf_counter()
+        await bulk_insert(db, Payment.__table__, PAYMENT_COLUMNS, rows)
+        await db.commit()
+        return time.perf_counter() - started
+
+
+async def main(sizes, orm_max_rows):
+    if not BENCH_DATABASE_URL:
+        raise SystemExit("BENCH_DATABASE_URL must be set")
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    await seed(engine)
+
+    print(f"{'rows':>10} {'path':>5} {'seconds':>10} {'rows/sec':>12}")
+    for size in sizes:
+        rows = make_rows(size)
+        for name, runner in (("orm", run_orm), ("bulk", run_bulk)):
+            if name == "orm" and size > orm_max_rows:
+                print(f"{size:>10} {name:>5} {'skipped':>10} {'-':>12}")
+                continue
+            await truncate_payments(engine)
+            elapsed = await runner(engine, rows)
+            print(f"{size:>10} {name:>5} {elapsed:>10.2f} {size / elapsed:>12.0f}")
+
+    await truncate_payments(engine)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--orm-max-rows", type=int, default=10_000_000,
+                        help="skip the ORM path above this size (it keeps every object in memory)")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.orm_max_rows))
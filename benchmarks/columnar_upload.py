@@ -0,0 +1,103 @@
+"""Compare the TSV upload path with Parquet and Arrow IPC for the same rows.
+
+Converts the generator's TSV files (``benchmarks.generator``) to Parquet and
+Arrow next to them, then for every table and format prints the file size (the
+bytes on the wire) and the time ``parse_table`` takes to turn it into
+validated rows, which is the part of an upload the format changes.
+
+With ``--url`` the files are also uploaded to a running server with
+``background=false`` and the full load time is measured. The table is
+truncated through ``BENCH_DATABASE_URL`` before every upload, so point both
+at a disposable database with the schema applied.
+
+Usage:
+    python -m benchmarks.generator --payments 1000000 --out bench_data
+    python -m benchmarks.columnar_upload --data bench_data --tables credits payments \\
+        [--url http://localhost:8000]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", os.getenv("BENCH_DATABASE_URL", "postgresql+asyncpg://bench@localhost/bench"))
+
+import pyarrow as pa  # noqa: E402
+import pyarrow.feather as feather  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from benchmarks.client import upload  # noqa: E402
+from app.services.csv_validation import arrow_type  # noqa: E402
+from app.services.parsers import SCHEMA_MAPPING, parse_table  # noqa: E402
+
+FORMATS = ["tsv", "parquet", "arrow"]
+
+
+def convert(data_dir: str, table_name: str) -> None:
+    with open(os.path.join(data_dir, f"{table_name}.tsv"), "rb") as f:
+        columns, rows, errors = parse_table(table_name, f.read())
+    if errors:
+        raise SystemExit(f"{table_name}.tsv does not validate: {errors[:3]}")
+
+    fields = SCHEMA_MAPPING[table_name].model_fields
+    schema = pa.schema([(name, arrow_type(fields[name].annotation)) for name in columns])
+    table = pa.Table.from_pylist([dict(zip(columns, row)) for row in rows], schema=schema)
+    pq.write_table(table, os.path.join(data_dir, f"{table_name}.parquet"))
+    feather.write_feather(table, os.path.join(data_dir, f"{table_name}.arrow"))
+
+
+def timed_parse(table_name: str, content: bytes, file_format: str) -> float:
+    started = time.perf_counter()
+    _, rows, errors = parse_table(table_name, content, file_format)
+    elapsed = time.perf_counter() - started
+    if errors:
+        raise SystemExit(f"{table_name}.{file_format} does not validate: {errors[:3]}")
+    return elapsed
+
+
+async def truncate(table_name: str) -> None:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # TRUNCATE does not fire the triggers that keep credit_ids and payment_ids in step.
+    ids = {"credits": "credit_ids", "payments": "payment_ids"}.get(table_name)
+    tables = f"{table_name}, {ids}" if ids else table_name
+    engine = create_async_engine(os.environ["BENCH_DATABASE_URL"])
+    async with engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+    await engine.dispose()
+
+
+def main(data_dir: str, tables, url: str):
+    if url and not os.getenv("BENCH_DATABASE_URL"):
+        raise SystemExit("BENCH_DATABASE_URL must be set to load through --url")
+
+    for table_name in tables:
+        convert(data_dir, table_name)
+        print(table_name)
+        tsv_size = None
+        for file_format in FORMATS:
+            filename = f"{table_name}.{file_format}"
+            with open(os.path.join(data_dir, filename), "rb") as f:
+                content = f.read()
+            tsv_size = tsv_size or len(content)
+            line = (f"  {file_format:<8} size={len(content) / 1024 / 1024:8.2f}MB "
+                    f"({len(content) / tsv_size:5.2f}x) parse={timed_parse(table_name, content, file_format):7.2f}s")
+
+            if url:
+                asyncio.run(truncate(table_name))
+                started = time.perf_counter()
+                status, body = upload(f"{url}/upload/upload_csv/{table_name}?background=false", filename, content)
+                line += f" load={time.perf_counter() - started:7.2f}s status={status}"
+                if status != 200:
+                    line += f" {body[:200]!r}"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default="bench_data")
+    parser.add_argument("--tables", nargs="+", default=["credits", "payments"])
+    parser.add_argument("--url", default=None, help="base URL of a running server to upload to")
+    args = parser.parse_args()
+    main(args.data, args.tables, args.url)
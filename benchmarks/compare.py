@@ -0,0 +1,67 @@
+"""Compare two ``benchmarks.runner`` result files and flag regressions.
+
+Latency percentiles regress when they grow, throughput and ingestion
+rows/sec regress when they drop. Any change worse than ``--threshold``
+(10% by default) is marked and makes the script exit with status 1, so it
+can gate a change in CI.
+
+Usage:
+    python -m benchmarks.compare bench_results/baseline.json bench_results/candidate.json
+"""
+import argparse
+import json
+import sys
+
+HIGHER_IS_WORSE = ("p50_ms", "p95_ms", "p99_ms")
+LOWER_IS_WORSE = ("throughput_rps",)
+
+
+def _metrics(report: dict) -> dict:
+    metrics = {}
+    for name, stats in report.get("endpoints", {}).items():
+        for key in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            if key in stats:
+                metrics[(name, key)] = stats[key]
+    for name, stats in report.get("ingest", {}).items():
+        if "rows_per_second" in stats:
+            metrics[(f"ingest:{name}", "rows_per_second")] = stats["rows_per_second"]
+    return metrics
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    base, new = _metrics(baseline), _metrics(candidate)
+    rows = []
+    for key in sorted(base.keys() & new.keys()):
+        old_value, new_value = base[key], new[key]
+        change = (new_value - old_value) / old_value if old_value else 0.0
+        worse = change if key[1] in HIGHER_IS_WORSE else -change
+        rows.append((key, old_value, new_value, change, worse > threshold))
+    return rows
+
+
+def main(baseline_path: str, candidate_path: str, threshold: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(candidate_path, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    if baseline.get("meta", {}).get("dataset") != candidate.get("meta", {}).get("dataset"):
+        print("warning: the results were produced from different datasets")
+
+    rows = compare(baseline, candidate, threshold)
+    for (name, metric), old_value, new_value, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:<24} {metric:<16} {old_value:>12.2f} {new_value:>12.2f} {change:>+8.1%} {flag}")
+
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    sys.exit(main(args.baseline, args.candidate, args.threshold))
@@ -0,0 +1,79 @@
+"""Measure GET latency on a running server while a large workbook is ingested.
+
+Builds a plans workbook (100k rows by default), then polls
+``/credits/user_credits/{user_id}`` and prints p50/p95/p99/max latency twice:
+once on an idle server and once while the workbook is being uploaded with
+``?background=false``. With parsing on the executor the two distributions
+should stay close. The workbook rows use periods far in the future, so
+re-running the script does not collide with real plans.
+
+Usage:
+    uvicorn app.main:app &
+    python -m benchmarks.event_loop_latency --base-url http://127.0.0.1:8000 --rows 100000
+"""
+import argparse
+import io
+import statistics
+import threading
+import time
+from datetime import date
+
+from openpyxl import Workbook
+
+from benchmarks.client import get, upload
+
+
+def make_workbook(rows: int) -> bytes:
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["period", "category", "sum"])
+    for i in range(rows):
+        sheet.append([date(3000 + i // 24, i % 12 + 1, 1), "видача" if i % 24 < 12 else "збір", 1000 + i])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def poll(url: str, stop: threading.Event, samples: list) -> None:
+    while not stop.is_set():
+        samples.append(get(url)[1])
+
+
+def describe(name: str, samples: list) -> None:
+    ordered = sorted(samples)
+    quantiles = statistics.quantiles(ordered, n=100)
+    print(f"{name:<8} n={len(ordered):<6} p50={quantiles[49]:.1f}ms p95={quantiles[94]:.1f}ms "
+          f"p99={quantiles[98]:.1f}ms max={ordered[-1]:.1f}ms")
+
+
+def main(base_url: str, rows: int, user_id: int, idle_seconds: float):
+    content = make_workbook(rows)
+    url = f"{base_url}/credits/user_credits/{user_id}"
+
+    idle, stop = [], threading.Event()
+    poller = threading.Thread(target=poll, args=(url, stop, idle))
+    poller.start()
+    time.sleep(idle_seconds)
+    stop.set()
+    poller.join()
+
+    loaded, stop = [], threading.Event()
+    poller = threading.Thread(target=poll, args=(url, stop, loaded))
+    poller.start()
+    status, _ = upload(f"{base_url}/plan/plans_insert?background=false", "plans.xlsx", content)
+    stop.set()
+    poller.join()
+
+    print(f"upload finished with HTTP {status}")
+    describe("idle", idle)
+    describe("ingest", loaded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    main(args.base_url, args.rows, args.user_id, args.idle_seconds)
@@ -0,0 +1,170 @@
+"""EXPLAIN the hot-path queries that read the large tables, with and without the secondary indexes.
+
+Month, year and range performance read ``performance_rollup`` and ``plans``
+only, so they are left out; what still reads ``credits``, ``payments`` or
+``credit_balances`` on a request is the user's credits, the export page, the
+overdue buckets (from the ledger for today, from ``payments`` for a past
+``as_of``) and the rollup refresh of a loaded month.
+
+Lookups must reach the large tables through an index. Range reads (the
+overdue book, a month of the rollup refresh) read whole partitions whatever
+the indexes, so for them the check is that the partitions outside the range
+are pruned. Scans of monthly partitions are reported against their table;
+empty partitions (months created ahead of time) are ignored.
+
+The indexes from the ``a32a6b212e80`` and ``5e0b7c9a3d41`` migrations are dropped inside a
+transaction that is rolled back afterwards, so the database is left as it
+was, but the DROP takes exclusive locks: run it against a disposable,
+realistically sized database (see ``benchmarks.year_performance`` for a
+seeder). Exits with status 1 if a lookup still sequentially scans one of
+the large tables, or a range read scans a partition outside its range,
+while the indexes are present.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.explain_hot_paths
+"""
+import asyncio
+import json
+import os
+import sys
+from datetime import date
+
+BENCH_DATABASE_URL = os.environ.setdefault("BENCH_DATABASE_URL", os.getenv("DATABASE_URL", ""))
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+
+from sqlalchemy import select, text  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models import Credit, Dictionary, Payment  # noqa: E402
+from app.services.credit_queries import (  # noqa: E402
+    credit_export_page_query,
+    overdue_buckets_query,
+    user_credits_query,
+)
+from app.services.partitions import add_months, month_start, partition_month  # noqa: E402
+
+INDEXES = [
+    "ix_credits_user_id",
+    "ix_credits_issuance_date_cover",
+    "ix_payments_credit_id",
+    "ix_payments_payment_date",
+    "ix_payments_type_id_payment_date",
+    "ix_dictionary_name",
+]
+LARGE_TABLES = {"credits", "payments", "credit_balances"}
+
+
+def hot_queries():
+    """Map each query name to the statement and, for range reads, the first and last month it may read."""
+    today = date.today()
+    past = date(today.year - 1, 6, 30)
+    month = month_start(past)
+    return {
+        "user_credits": (user_credits_query(1, today), None),
+        "export page": (credit_export_page_query(0, settings.EXPORT_PAGE_SIZE, today), None),
+        "plans_insert categories": (
+            select(Dictionary.name, Dictionary.id).where(Dictionary.name.in_(["видача", "збір"])),
+            None,
+        ),
+        "overdue_buckets today": (
+            overdue_buckets_query(today, 1, by_issuance_month=True, from_ledger=True),
+            (date.min, month_start(today)),
+        ),
+        "overdue_buckets past as_of": (
+            overdue_buckets_query(past, 1, by_issuance_month=True),
+            (date.min, month),
+        ),
+        "rollup refresh credits": (
+            select(Credit.issuance_date, Credit.body).where(
+                Credit.issuance_date >= month, Credit.issuance_date < add_months(month, 1)
+            ),
+            (month, month),
+        ),
+        "rollup refresh payments": (
+            select(Payment.payment_date, Payment.sum).where(
+                Payment.payment_date >= month, Payment.payment_date < add_months(month, 1)
+            ),
+            (month, month),
+        ),
+    }
+
+
+def scans(plan):
+    if "Relation Name" in plan:
+        yield plan["Node Type"], plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from scans(child)
+
+
+def table_of(relation):
+    # Partitions are named <table>_yYYYYmMM.
+    return relation.rsplit("_y", 1)[0] if partition_month(relation) else relation
+
+
+async def explain(conn, stmt, empty):
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return sorted({(node, relation) for node, relation in scans(plan[0]["Plan"]) if relation not in empty})
+
+
+def describe(found):
+    return ", ".join(sorted({f"{node} on {table_of(relation)}" for node, relation in found})) or "-"
+
+
+def problems(found, months):
+    large = [(node, relation) for node, relation in found if table_of(relation) in LARGE_TABLES]
+    if months is None:
+        return sorted({table_of(relation) for node, relation in large if node == "Seq Scan"})
+    first, last = months
+    return sorted(
+        relation for _, relation in large
+        if partition_month(relation) and not first <= partition_month(relation) <= last
+    )
+
+
+async def main():
+    if not BENCH_DATABASE_URL:
+        raise SystemExit("BENCH_DATABASE_URL must be set")
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    queries = hot_queries()
+    failed = []
+
+    async with engine.connect() as conn:
+        empty = set((await conn.execute(text(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND relpages = 0 AND relname ~ '_y[0-9]{4}m[0-9]{2}$'"
+        ))).scalars())
+        with_indexes = {name: await explain(conn, stmt, empty) for name, (stmt, _) in queries.items()}
+
+        for index in INDEXES:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+        without_indexes = {name: await explain(conn, stmt, empty) for name, (stmt, _) in queries.items()}
+        await conn.rollback()
+
+    for name, (_, months) in queries.items():
+        if months is None:
+            print(name)
+        else:
+            first = "" if months[0] == date.min else f"{months[0]:%Y-%m}"
+            print(f"{name} ({first}..{months[1]:%Y-%m})")
+        print(f"  without indexes: {describe(without_indexes[name])}")
+        print(f"  with indexes:    {describe(with_indexes[name])}")
+        found = problems(with_indexes[name], months)
+        if found:
+            print(f"  {'sequential scan on' if months is None else 'partitions outside the range:'} {', '.join(found)}")
+            failed.append(name)
+
+    await engine.dispose()
+
+    if failed:
+        print(f"failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
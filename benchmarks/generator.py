@@ -0,0 +1,128 @@
+"""Deterministic synthetic dataset in the formats the upload endpoints accept.
+
+Writes ``users.tsv``, ``credits.tsv``, ``dictionary.tsv``, ``plans.tsv`` and
+``payments.tsv`` (tab separated, dates as dd.mm.yyyy, as ``upload_csv``
+expects) plus ``plans.xlsx`` for ``/plan/plans_insert``. Everything is
+derived from ``--seed`` and ``--payments``, so two runs with the same
+arguments produce identical files. Rows are streamed to disk, so 50M
+payments need memory only for one date per credit.
+
+Usage:
+    python -m benchmarks.generator --payments 1000000 --out bench_data
+"""
+import argparse
+import json
+import os
+import random
+from array import array
+from datetime import date, timedelta
+
+from openpyxl import Workbook
+
+DICTIONARY = [(1, "тіло"), (2, "відсотки"), (3, "видача"), (4, "збір")]
+ISSUANCE_CATEGORY_ID = 3
+COLLECTION_CATEGORY_ID = 4
+BODY_TYPE_ID = 1
+PERCENT_TYPE_ID = 2
+
+START_DATE = date(2023, 1, 1)
+DAYS = 730
+PAYMENTS_PER_CREDIT = 10
+CREDITS_PER_USER = 5
+
+
+def _csv_date(value: date) -> str:
+    return value.strftime("%d.%m.%Y")
+
+
+def _months():
+    month = START_DATE
+    end = START_DATE + timedelta(days=DAYS)
+    while month < end:
+        yield month
+        month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def sizes(payments: int):
+    credits = max(payments // PAYMENTS_PER_CREDIT, 1)
+    users = max(credits // CREDITS_PER_USER, 1)
+    return users, credits, payments
+
+
+def generate(out_dir: str, payments: int, seed: int = 42) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    users, credits, payments = sizes(payments)
+    start_ordinal = START_DATE.toordinal()
+
+    with open(os.path.join(out_dir, "dictionary.tsv"), "w", encoding="utf-8") as f:
+        f.write("id\tname\n")
+        for entry_id, name in DICTIONARY:
+            f.write(f"{entry_id}\t{name}\n")
+
+    with open(os.path.join(out_dir, "users.tsv"), "w", encoding="utf-8") as f:
+        f.write("id\tlogin\tregistration_date\n")
+        for user_id in range(1, users + 1):
+            registered = date.fromordinal(start_ordinal - rng.randrange(1, 365))
+            f.write(f"{user_id}\tuser_{user_id}\t{_csv_date(registered)}\n")
+
+    issued = array("i")
+    with open(os.path.join(out_dir, "credits.tsv"), "w", encoding="utf-8") as f:
+        f.write("id\tuser_id\tissuance_date\treturn_date\tactual_return_date\tbody\tpercent\n")
+        for credit_id in range(1, credits + 1):
+            issuance = start_ordinal + rng.randrange(DAYS)
+            issued.append(issuance)
+            return_date = issuance + rng.randrange(30, 366)
+            actual = ""
+            if rng.random() < 0.6:
+                actual = _csv_date(date.fromordinal(issuance + rng.randrange(10, 400)))
+            body = rng.randrange(1_000, 100_000)
+            f.write(
+                f"{credit_id}\t{rng.randrange(1, users + 1)}\t{_csv_date(date.fromordinal(issuance))}\t"
+                f"{_csv_date(date.fromordinal(return_date))}\t{actual}\t{body}\t{round(body * 0.2, 2)}\n"
+            )
+
+    with open(os.path.join(out_dir, "payments.tsv"), "w", encoding="utf-8") as f:
+        f.write("id\tsum\tpayment_date\tcredit_id\ttype_id\n")
+        for payment_id in range(1, payments + 1):
+            credit_id = rng.randrange(1, credits + 1)
+            paid = date.fromordinal(issued[credit_id - 1] + rng.randrange(0, 365))
+            type_id = BODY_TYPE_ID if rng.random() < 0.7 else PERCENT_TYPE_ID
+            f.write(f"{payment_id}\t{rng.randrange(100, 10_000)}.{rng.randrange(100):02d}\t"
+                    f"{_csv_date(paid)}\t{credit_id}\t{type_id}\n")
+
+    plans = [
+        (month, category_id, rng.randrange(1_000_000, 50_000_000))
+        for month in _months()
+        for category_id in (ISSUANCE_CATEGORY_ID, COLLECTION_CATEGORY_ID)
+    ]
+    names = dict(DICTIONARY)
+
+    with open(os.path.join(out_dir, "plans.tsv"), "w", encoding="utf-8") as f:
+        f.write("id\tperiod\tsum\tcategory_id\n")
+        for plan_id, (month, category_id, amount) in enumerate(plans, start=1):
+            f.write(f"{plan_id}\t{_csv_date(month)}\t{amount}\t{category_id}\n")
+
+    # The workbook covers the months after the TSV plans so it can be inserted on top of them.
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["period", "category", "sum"])
+    for month, category_id, amount in plans:
+        sheet.append([date(month.year + 2, month.month, 1), names[category_id], amount])
+    workbook.save(os.path.join(out_dir, "plans.xlsx"))
+
+    manifest = {"users": users, "credits": credits, "payments": payments, "plans": len(plans),
+                "dictionary": len(DICTIONARY), "seed": seed}
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--payments", type=int, default=10_000, help="10k to 50M")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args()
+    print(generate(args.out, args.payments, args.seed))
@@ -0,0 +1,104 @@
+"""Time the overdue bucket report and check it against a Python recomputation.
+
+Reuses the seeder from ``benchmarks.year_performance`` (it truncates the
+tables, so point it at a disposable database), then runs
+``overdue_buckets_query`` for a few as-of dates and prints the time and the
+per-bucket totals next to the same numbers computed row by row in Python.
+The Python check reads the whole book, so skip it with ``--no-check`` for
+the large sizes. Today's report is run both from payments and from the
+``credit_balances`` ledger, which must agree.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.overdue_buckets --sizes 100000 10000000
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from benchmarks.year_performance import BENCH_DATABASE_URL, YEAR, seed
+from app.models import Credit, Payment
+from app.services.credit_queries import OVERDUE_BUCKETS, overdue_buckets_query
+
+AS_OF_DATES = [date(YEAR, 6, 30), date(YEAR + 1, 1, 20), date(YEAR + 1, 3, 15), date(YEAR + 1, 6, 1)]
+
+
+def bucket_of(days: int) -> int:
+    if days <= 0:
+        return 0
+    if days <= 30:
+        return 1
+    if days <= 90:
+        return 2
+    return 3
+
+
+async def python_buckets(db: AsyncSession, as_of: date) -> dict:
+    paid = defaultdict(float)
+    payments = await db.stream(select(Payment.credit_id, Payment.sum).where(
+        Payment.type_id == 1, Payment.payment_date <= as_of))
+    async for credit_id, amount in payments:
+        paid[credit_id] += float(amount)
+
+    totals = defaultdict(lambda: [0, 0.0])
+    credits = await db.stream(select(Credit.id, Credit.issuance_date, Credit.return_date,
+                                     Credit.actual_return_date, Credit.body))
+    async for credit_id, issued, return_date, returned, body in credits:
+        if issued > as_of or (returned is not None and returned <= as_of):
+            continue
+        total = totals[OVERDUE_BUCKETS[bucket_of((as_of - return_date).days)]]
+        total[0] += 1
+        total[1] += max(body - paid[credit_id], 0)
+    return totals
+
+
+async def main(sizes, check: bool):
+    if not BENCH_DATABASE_URL:
+        raise SystemExit("BENCH_DATABASE_URL must be set")
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+
+    for size in sizes:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            await seed(db, size)
+            await db.execute(text("ANALYZE"))
+
+            print(f"payments={size}")
+            for as_of in AS_OF_DATES:
+                for by_month in (False, True):
+                    started = time.perf_counter()
+                    rows = (await db.execute(overdue_buckets_query(as_of, 1, by_month))).all()
+                    elapsed = time.perf_counter() - started
+                    print(f"  as_of={as_of} by_month={by_month!s:<5} rows={len(rows):<4} time={elapsed * 1000:.1f}ms")
+
+                if check:
+                    rows = (await db.execute(overdue_buckets_query(as_of, 1))).all()
+                    expected = await python_buckets(db, as_of)
+                    for row in rows:
+                        count, outstanding = expected[OVERDUE_BUCKETS[row.bucket]]
+                        print(f"    {OVERDUE_BUCKETS[row.bucket]:<6} sql={row.credit_count}/{float(row.outstanding_body):.2f} "
+                              f"python={count}/{outstanding:.2f}")
+
+            today = date.today()
+            results = {}
+            for from_ledger in (False, True):
+                started = time.perf_counter()
+                results[from_ledger] = (await db.execute(overdue_buckets_query(today, 1, from_ledger=from_ledger))).all()
+                elapsed = time.perf_counter() - started
+                print(f"  as_of={today} from_ledger={from_ledger!s:<5} time={elapsed * 1000:.1f}ms")
+            if results[False] != results[True]:
+                raise SystemExit(f"ledger and payments disagree: {results[True]} != {results[False]}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--no-check", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, not args.no_check))
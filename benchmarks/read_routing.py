@@ -0,0 +1,110 @@
+"""Check the read router against two local databases standing in for a primary and a replica.
+
+Builds a ``ReadRouter`` with the replica, a second replica on a port nothing
+listens on, and the primary as the fallback, then checks that:
+
+* a session that runs no statement does not connect, even to the dead replica;
+* sessions alternate between the live replica and the dead one; the first read
+  on the dead one fails and marks it down, the ones after it skip it;
+* a failed replica is skipped until ``--retry`` seconds have passed;
+* with every replica down, reads land on the primary.
+
+Each database reports which one answered through ``current_database()``, so
+use two databases with different names (they can live on the same server).
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://.../bank \\
+    BENCH_REPLICA_URL=postgresql+asyncpg://.../bank_replica \\
+        python -m benchmarks.read_routing
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core.database import ReadRouter
+
+BENCH_REPLICA_URL = os.getenv("BENCH_REPLICA_URL")
+
+
+async def answered_by(router: ReadRouter) -> str:
+    try:
+        async with router.session() as session:
+            return (await session.execute(text("SELECT current_database()"))).scalar_one()
+    except OSError:
+        return "failed"
+
+
+def check(label: str, ok: bool) -> bool:
+    print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    return ok
+
+
+async def main(retry: float, dead_port: int):
+    if not BENCH_REPLICA_URL:
+        raise SystemExit("BENCH_REPLICA_URL must be set")
+
+    primary = create_async_engine(settings.DATABASE_URL)
+    replica = create_async_engine(BENCH_REPLICA_URL)
+    dead = create_async_engine(
+        make_url(BENCH_REPLICA_URL).set(port=dead_port),
+        connect_args={"timeout": settings.READ_CONNECT_TIMEOUT},
+    )
+    router = ReadRouter([replica, dead], primary, retry)
+
+    async with primary.connect() as conn:
+        primary_name = (await conn.execute(text("SELECT current_database()"))).scalar_one()
+    async with replica.connect() as conn:
+        replica_name = (await conn.execute(text("SELECT current_database()"))).scalar_one()
+    if primary_name == replica_name:
+        raise SystemExit("the primary and the replica must be different databases")
+
+    results = []
+
+    for _ in range(2):
+        async with router.session():
+            pass
+    results.append(check("sessions without statements do not connect", len(router.candidates()) == 3))
+
+    started = time.perf_counter()
+    answers = [await answered_by(router) for _ in range(4)]
+    elapsed = time.perf_counter() - started
+    print(f"round robin: {answers} in {elapsed * 1000:.1f}ms")
+    results.append(check(
+        "one read failed on the dead replica, the rest answered by the live one",
+        sorted(answers) == sorted(["failed"] + [replica_name] * 3),
+    ))
+    results.append(check("dead replica marked down", router.candidates()[:-1] == [replica]))
+
+    router.mark_down(replica)
+    answers = [await answered_by(router) for _ in range(2)]
+    print(f"all replicas down: {answers}")
+    results.append(check("reads fall back to the primary", set(answers) == {primary_name}))
+
+    await asyncio.sleep(retry)
+    results.append(check(f"replicas retried after {retry}s", len(router.candidates()) == 3))
+    answers = [await answered_by(router) for _ in range(3)]
+    print(f"after retry: {answers}")
+    results.append(check(
+        "reads back on the replica, the dead one failing once more",
+        answers.count("failed") <= 1 and set(answers) - {"failed"} == {replica_name},
+    ))
+
+    for db_engine in (primary, replica, dead):
+        await db_engine.dispose()
+
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--retry", type=float, default=1.0, help="seconds a failed replica is skipped for")
+    parser.add_argument("--dead-port", type=int, default=1, help="a port with nothing listening on it")
+    args = parser.parse_args()
+    asyncio.run(main(args.retry, args.dead_port))
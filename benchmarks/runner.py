@@ -0,0 +1,149 @@
+"""Load a generated dataset into a running server and benchmark every endpoint.
+
+The server should run against a local, empty PostgreSQL database with the
+schema applied. The runner uploads the files written by
+``benchmarks.generator`` in dependency order (synchronously, with
+``?background=false``), then fires ``--requests`` GETs at every read
+endpoint with ``--concurrency`` threads and records throughput and
+p50/p95/p99 latency. Request parameters vary over the dataset's date
+range and users, so results are not a single cached response. Results go
+to a JSON file that ``benchmarks.compare`` understands.
+
+Usage:
+    python -m benchmarks.generator --payments 1000000 --out bench_data
+    python -m benchmarks.runner --data bench_data --out results/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from benchmarks.client import get, upload
+from benchmarks.generator import DAYS, START_DATE
+
+UPLOAD_ORDER = ["users", "dictionary", "credits", "plans", "payments"]
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def ingest(base_url: str, data_dir: str) -> dict:
+    results = {}
+    for table_name in UPLOAD_ORDER:
+        with open(os.path.join(data_dir, f"{table_name}.tsv"), "rb") as f:
+            content = f.read()
+        rows = content.count(b"\n") - 1
+        started = time.perf_counter()
+        status, body = upload(f"{base_url}/upload/upload_csv/{table_name}?background=false",
+                              f"{table_name}.tsv", content)
+        elapsed = time.perf_counter() - started
+        if status != 200:
+            raise SystemExit(f"Uploading {table_name} failed with HTTP {status}: {body[:500]!r}")
+        results[table_name] = {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed}
+
+    with open(os.path.join(data_dir, "plans.xlsx"), "rb") as f:
+        content = f.read()
+    started = time.perf_counter()
+    status, body = upload(f"{base_url}/plan/plans_insert?background=false", "plans.xlsx", content)
+    elapsed = time.perf_counter() - started
+    if status != 200:
+        raise SystemExit(f"Uploading plans.xlsx failed with HTTP {status}: {body[:500]!r}")
+    results["plans_insert"] = {"seconds": elapsed}
+
+    return results
+
+
+def endpoint_urls(base_url: str, users: int, rng: random.Random) -> dict:
+    def month_performance():
+        day = START_DATE + timedelta(days=rng.randrange(DAYS))
+        return f"{base_url}/plan/month_performance?target_date={day.isoformat()}"
+
+    def year_performance():
+        return f"{base_url}/plan/year_performance?year={START_DATE.year + rng.randrange(DAYS // 365 + 1)}"
+
+    def performance_range():
+        start = START_DATE + timedelta(days=rng.randrange(DAYS // 2))
+        granularity = rng.choice(("month", "week"))
+        return (f"{base_url}/plan/performance_range?from={start.isoformat()}"
+                f"&to={(start + timedelta(days=DAYS // 2)).isoformat()}&granularity={granularity}")
+
+    def user_credits():
+        return f"{base_url}/credits/user_credits/{rng.randrange(1, users + 1)}"
+
+    return {
+        "month_performance": month_performance,
+        "year_performance": year_performance,
+        "performance_range": performance_range,
+        "user_credits": user_credits,
+    }
+
+
+def measure(make_url, requests: int, concurrency: int) -> dict:
+    urls = [make_url() for _ in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(get, urls))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": requests,
+        "errors": sum(1 for status, _ in results if status >= 500),
+        "throughput_rps": requests / elapsed,
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+    }
+
+
+def main(base_url: str, data_dir: str, requests: int, concurrency: int, out: str, skip_ingest: bool):
+    with open(os.path.join(data_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    rng = random.Random(manifest["seed"])
+
+    report = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "base_url": base_url,
+            "dataset": manifest,
+            "requests": requests,
+            "concurrency": concurrency,
+        },
+        "ingest": {} if skip_ingest else ingest(base_url, data_dir),
+        "endpoints": {},
+    }
+
+    for name, make_url in endpoint_urls(base_url, manifest["users"], rng).items():
+        report["endpoints"][name] = measure(make_url, requests, concurrency)
+        stats = report["endpoints"][name]
+        print(f"{name:<20} {stats['throughput_rps']:>8.1f} req/s  p50={stats['p50_ms']:.1f}ms "
+              f"p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms errors={stats['errors']}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--data", default="bench_data")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--out", default=f"bench_results/{date.today().isoformat()}.json")
+    parser.add_argument("--skip-ingest", action="store_true", help="benchmark reads against already loaded data")
+    args = parser.parse_args()
+    main(args.base_url, args.data, args.requests, args.concurrency, args.out, args.skip_ingest)
@@ -0,0 +1,85 @@
+"""Measure worker cold start: importing the app, running the lifespan, and the first hot query.
+
+Every run is a fresh interpreter, like a new uvicorn worker. The import phase
+needs no database and reports the time to import ``app.main``, the peak RSS,
+and which heavy libraries were loaded along the way. The import-only numbers
+before and after lazy loading can be compared by running this on both commits.
+
+With ``--lifespan`` the child also runs the app's startup (schema check,
+dictionary load, pool warm-up) against ``DATABASE_URL``, then times the first
+``/credits/user_credits`` query on the read pool, which the warm-up is meant
+to make as fast as any later one.
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.startup --runs 10 [--lifespan]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "numpy", "openpyxl", "alembic"]
+
+CHILD = """
+import asyncio, json, resource, sys, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter() - started
+report = {
+    "import": imported,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [name for name in HEAVY if name in sys.modules],
+}
+
+async def run_lifespan():
+    from datetime import date
+    from app.core.database import read_router
+    from app.services.credit_queries import user_credits_query
+
+    started = time.perf_counter()
+    async with app.main.lifespan(app.main.app):
+        report["lifespan"] = time.perf_counter() - started
+        stmt = lambda: user_credits_query(1, date.today())
+        for key in ("first_query", "second_query"):
+            started = time.perf_counter()
+            async with read_router.session() as session:
+                await session.execute(stmt())
+            report[key] = time.perf_counter() - started
+
+if LIFESPAN:
+    asyncio.run(run_lifespan())
+print(json.dumps(report))
+"""
+
+
+def run_child(lifespan: bool) -> dict:
+    code = f"HEAVY = {HEAVY_MODULES!r}\nLIFESPAN = {lifespan!r}\n{CHILD}"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=os.environ.copy()
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs: int, lifespan: bool):
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL must be set (the import phase does not connect)")
+
+    reports = [run_child(lifespan) for _ in range(runs)]
+
+    for key, unit, scale in [("import", "ms", 1000), ("rss_mb", "MB", 1), ("lifespan", "ms", 1000),
+                             ("first_query", "ms", 1000), ("second_query", "ms", 1000)]:
+        values = [report[key] * scale for report in reports if key in report]
+        if values:
+            print(f"{key:<13} median={statistics.median(values):.1f}{unit} "
+                  f"min={min(values):.1f}{unit} max={max(values):.1f}{unit}")
+    print(f"heavy modules loaded at import: {reports[0]['loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--lifespan", action="store_true", help="also run the startup against DATABASE_URL")
+    args = parser.parse_args()
+    main(args.runs, args.lifespan)
@@ -0,0 +1,144 @@
+"""Check the year_performance query against the legacy fan-out query.
+
+Seeds a disposable database with synthetic data for one year at growing
+sizes, rebuilds the rollup and, for every size, prints the timings of the
+legacy query and of ``year_performance_query`` together with the yearly
+totals each one reports and the totals computed directly from the fact
+tables.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.year_performance --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+BENCH_DATABASE_URL = os.environ.setdefault("BENCH_DATABASE_URL", os.getenv("DATABASE_URL", ""))
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+
+from sqlalchemy import and_, case, extract, func, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from app.models import Credit, Dictionary, Payment, Plan, User  # noqa: E402
+from app.services.balances import rebuild_balances  # noqa: E402
+from app.services.bulk_insert import bulk_insert  # noqa: E402
+from app.services.dictionary_cache import dictionary_cache  # noqa: E402
+from app.services.performance_queries import year_bounds, year_performance_query  # noqa: E402
+from app.services.rollup import rebuild_rollup  # noqa: E402
+
+YEAR = 2024
+
+
+def legacy_query(year: int):
+    plan_subquery = (
+        select(
+            extract("month", Plan.period).label("month"),
+            func.sum(case((Dictionary.name == "видача", Plan.sum), else_=0)).label("plan_credit_sum"),
+            func.sum(case((Dictionary.name == "збір", Plan.sum), else_=0)).label("plan_payment_sum"),
+        )
+        .join(Dictionary, Plan.category_id == Dictionary.id)
+        .where(extract("year", Plan.period) == year)
+        .group_by(extract("month", Plan.period))
+        .subquery()
+    )
+    return (
+        select(
+            plan_subquery.c.month,
+            func.count(func.distinct(Credit.id)).label("credit_count"),
+            func.sum(case((Dictionary.name == "видача", Credit.body), else_=0)).label("actual_credit_sum"),
+            func.count(func.distinct(Payment.id)).label("payment_count"),
+            func.sum(case((Dictionary.name == "збір", Payment.sum), else_=0)).label("actual_payment_sum"),
+        )
+        .select_from(Plan)
+        .join(Dictionary, Plan.category_id == Dictionary.id)
+        .outerjoin(Credit, and_(
+            Dictionary.name == "видача",
+            extract("year", Credit.issuance_date) == year,
+            extract("month", Credit.issuance_date) == extract("month", Plan.period),
+        ))
+        .outerjoin(Payment, and_(
+            Dictionary.name == "збір",
+            extract("year", Payment.payment_date) == year,
+            extract("month", Payment.payment_date) == extract("month", Plan.period),
+        ))
+        .join(plan_subquery, extract("month", Plan.period) == plan_subquery.c.month)
+        .where(extract("year", Plan.period) == year)
+        .group_by(plan_subquery.c.month, plan_subquery.c.plan_credit_sum, plan_subquery.c.plan_payment_sum)
+        .order_by(plan_subquery.c.month)
+    )
+
+
+async def seed(db: AsyncSession, payments: int):
+    rng = random.Random(payments)
+    credits = max(payments // 10, 1)
+    start = date(YEAR, 1, 1)
+
+    await db.execute(text("TRUNCATE performance_rollup, credit_balances, payments, payment_ids, credit_ids, credits, plans, users, dictionary CASCADE"))
+    await bulk_insert(db, Dictionary.__table__, ["id", "name"],
+                      [(1, "тіло"), (2, "відсотки"), (3, "видача"), (4, "збір")])
+    await bulk_insert(db, User.__table__, ["id", "login", "registration_date"], [(1, "bench", start)])
+    await bulk_insert(db, Plan.__table__, ["id", "period", "sum", "category_id"], [
+        (month * 2 + category - 3, date(YEAR, month, 1), Decimal("100000.00"), category)
+        for month in range(1, 13) for category in (3, 4)
+    ])
+    await bulk_insert(
+        db, Credit.__table__,
+        ["id", "user_id", "issuance_date", "return_date", "actual_return_date", "body", "percent"],
+        [(i, 1, start + timedelta(days=rng.randrange(366)), date(YEAR + 1, 1, 1), None,
+          float(rng.randrange(1000, 50000)), 10.0) for i in range(1, credits + 1)],
+    )
+    await bulk_insert(
+        db, Payment.__table__, ["id", "sum", "payment_date", "credit_id", "type_id"],
+        [(i, Decimal(rng.randrange(100, 5000)), start + timedelta(days=rng.randrange(366)),
+          rng.randrange(1, credits + 1), rng.choice((1, 2))) for i in range(1, payments + 1)],
+    )
+    await dictionary_cache.load(db)
+    await rebuild_rollup(db)
+    await rebuild_balances(db)
+    await db.commit()
+
+
+async def timed(db: AsyncSession, stmt):
+    started = time.perf_counter()
+    rows = (await db.execute(stmt)).all()
+    return time.perf_counter() - started, rows
+
+
+async def main(sizes):
+    if not BENCH_DATABASE_URL:
+        raise SystemExit("BENCH_DATABASE_URL must be set")
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    start, end = year_bounds(YEAR)
+
+    for size in sizes:
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            await seed(db, size)
+            await db.execute(text("ANALYZE"))
+
+            expected_credits = (await db.execute(select(func.sum(Credit.body)).where(
+                Credit.issuance_date >= start, Credit.issuance_date < end))).scalar()
+            expected_payments = (await db.execute(select(func.sum(Payment.sum)).where(
+                Payment.payment_date >= start, Payment.payment_date < end))).scalar()
+
+            legacy_time, legacy_rows = await timed(db, legacy_query(YEAR))
+            new_time, new_rows = await timed(db, year_performance_query(YEAR, 3, 4))
+
+        print(f"payments={size}")
+        print(f"  expected  credits={expected_credits:.2f} payments={expected_payments:.2f}")
+        for name, elapsed, rows in (("legacy", legacy_time, legacy_rows), ("new", new_time, new_rows)):
+            credits = sum(float(row.actual_credit_sum or 0) for row in rows)
+            payments = sum(float(row.actual_payment_sum or 0) for row in rows)
+            print(f"  {name:<8}  credits={credits:.2f} payments={payments:.2f} time={elapsed * 1000:.1f}ms")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    asyncio.run(main(parser.parse_args().sizes))